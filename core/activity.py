@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import get_model
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.module_loading import import_by_path
+from django.utils.six import text_type
+
+
+ACTION_DISPATCHER = {
+    'BACKEND': 'core.workers.ThreadBackend',
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 1,
+}
+ACTION_DISPATCHER.update(getattr(settings, 'ACTION_DISPATCHER', {}))
+
+# bulk_create() sends no post_save, this is sent once per written batch instead
+actions_created = Signal(providing_args=['actions'])
+
+
+def build_action(actor, verb, target=None, action_object=None, **kwargs):
+    """
+    Unsaved ``Action``, the same one ``actstream.actions.action_handler`` would save.
+    """
+    if hasattr(verb, '_proxy____args'):
+        verb = verb._proxy____args[0]
+    newaction = get_model('actstream', 'action')(
+        actor_content_type=ContentType.objects.get_for_model(actor),
+        actor_object_id=actor.pk,
+        verb=text_type(verb),
+        public=bool(kwargs.pop('public', True)),
+        description=kwargs.pop('description', None),
+        timestamp=kwargs.pop('timestamp', timezone.now()),
+    )
+    for opt, obj in (('target', target), ('action_object', action_object)):
+        if obj is not None:
+            setattr(newaction, '%s_object_id' % opt, obj.pk)
+            setattr(newaction, '%s_content_type' % opt,
+                    ContentType.objects.get_for_model(obj))
+    if kwargs:
+        newaction.data = kwargs
+    return newaction
+
+
+def write_actions(actions):
+    """
+    Bulk inserts ``actions`` and sends ``actions_created`` with the saved rows.
+    """
+    Action = get_model('actstream', 'action')
+    Action.objects.bulk_create(actions)
+    if not actions_created.has_listeners():
+        return
+    # bulk_create() doesn't set primary keys, read the batch back
+    stamps = set(action.timestamp for action in actions)
+    wanted = set((action.actor_content_type_id, str(action.actor_object_id),
+                  action.verb, action.timestamp) for action in actions)
+    saved = [action for action in Action.objects.filter(
+                 timestamp__gte=min(stamps), timestamp__lte=max(stamps),
+                 verb__in=set(action.verb for action in actions))
+             if (action.actor_content_type_id, action.actor_object_id,
+                 action.verb, action.timestamp) in wanted]
+    actions_created.send(sender=Action, actions=saved)
+
+
+class ActionDispatcher(object):
+    """
+    Batched replacement for ``actstream.action.send``.
+    """
+
+    def __init__(self, options=ACTION_DISPATCHER):
+        self.backend = import_by_path(options['BACKEND'])(options, write_actions,
+                                                          name='action-dispatcher')
+
+    def send(self, actor, verb, **kwargs):
+        self.backend.put(build_action(actor, verb, **kwargs))
+
+    def flush(self):
+        return self.backend.flush()
+
+
+dispatcher = ActionDispatcher()
+
@@ -0,0 +1,156 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db.models import signals
+from django.utils.http import urlencode
+from django.utils.module_loading import import_by_path
+from django.utils.six.moves.urllib.parse import urljoin
+
+from avatar.conf import settings as avatar_settings
+from avatar.models import Avatar, create_default_thumbnails
+from avatar.signals import avatar_updated
+from avatar.util import force_bytes, get_default_avatar_url, invalidate_cache
+
+from .caching import bump, cache
+
+AVATARS = {
+    'BACKEND': 'core.workers.ThreadBackend',
+    # generated once per upload, any other size is generated on first use
+    'SIZES': tuple(avatar_settings.AVATAR_AUTO_GENERATE_SIZES),
+    'LIST_SIZE': 32,
+    'TIMEOUT': 60 * 60 * 24,
+}
+AVATARS.update(getattr(settings, 'AVATARS', {}))
+
+logger = logging.getLogger(__name__)
+
+
+def _urls_key(user_id):
+    return 'avatar_urls:%s' % user_id
+
+
+def _pending_key(user_id):
+    return 'avatar_pending:%s' % user_id
+
+
+def forget(user_id):
+    """
+    Drops the user's cached avatar urls, and the anonymous listing pages
+    showing them.
+    """
+    cache.delete(_urls_key(user_id))
+    bump('avatars')
+
+
+def generate(avatar_id, sizes):
+    try:
+        avatar = Avatar.objects.select_related('user').get(pk=avatar_id)
+    except Avatar.DoesNotExist:
+        return
+    for size in sizes:
+        avatar.create_thumbnail(size)
+    # cached right away, a size outside SIZES would be queued again otherwise
+    cache.set(_urls_key(avatar.user_id),
+              dict((size, avatar.avatar_url(size)) for size in sizes), AVATARS['TIMEOUT'])
+    cache.delete(_pending_key(avatar.user_id))
+    bump('avatars')
+
+
+def generate_all(tasks):
+    for avatar_id, sizes in tasks:
+        try:
+            generate(avatar_id, sizes)
+        except Exception:
+            logger.exception('Thumbnails failed for avatar %s', avatar_id)
+
+
+backend = import_by_path(AVATARS['BACKEND'])(AVATARS, generate_all, name='avatar-thumbnails')
+
+
+def queue_thumbnails(avatar, sizes):
+    """
+    Queues ``sizes`` of ``avatar``; until they are written the user's avatar
+    resolves to the uploaded image.
+    """
+    cache.set(_pending_key(avatar.user_id), avatar.pk, AVATARS['TIMEOUT'])
+    backend.put((avatar.pk, tuple(sizes)))
+
+
+def _fallback_url(user, size):
+    # what avatar's {% avatar_url %} serves users without an avatar
+    if avatar_settings.AVATAR_GRAVATAR_BACKUP:
+        params = {'s': str(size)}
+        if avatar_settings.AVATAR_GRAVATAR_DEFAULT:
+            params['d'] = avatar_settings.AVATAR_GRAVATAR_DEFAULT
+        path = '%s/?%s' % (hashlib.md5(force_bytes(user.email or '')).hexdigest(),
+                           urlencode(params))
+        return urljoin(avatar_settings.AVATAR_GRAVATAR_BASE_URL, path)
+    return get_default_avatar_url()
+
+
+def avatar_urls(users, size=None):
+    """
+    ``{user pk: url}`` for a page of users: one cache round trip, plus a
+    single avatar query for the users not cached yet. Never touches storage.
+    """
+    size = size or avatar_settings.AVATAR_DEFAULT_SIZE
+    users = dict((user.pk, user) for user in users)
+    keys = dict((_urls_key(pk), pk) for pk in users)
+    keys.update((_pending_key(pk), pk) for pk in users)
+    cached = cache.get_many(list(keys))
+    pending = set(keys[key] for key in cached if key.startswith('avatar_pending:'))
+    known = dict((keys[key], value) for key, value in cached.items()
+                 if key.startswith('avatar_urls:'))
+    urls = dict((pk, known[pk][size]) for pk in users
+                if pk in known and size in known[pk])
+    missing = [pk for pk in users if pk not in urls]
+    if not missing:
+        return urls
+
+    primary = {}
+    for avatar in Avatar.objects.filter(user__in=missing) \
+            .order_by('user', '-primary', '-date_uploaded'):
+        if avatar.user_id not in primary:
+            # thumbnail paths are built from the username
+            avatar.user = users[avatar.user_id]
+            primary[avatar.user_id] = avatar
+    updates = {}
+    for pk in missing:
+        avatar = primary.get(pk)
+        if avatar is None:
+            urls[pk] = _fallback_url(users[pk], size)
+        elif pk in pending:
+            urls[pk] = avatar.avatar.url
+            continue
+        elif size in AVATARS['SIZES']:
+            urls[pk] = avatar.avatar_url(size)
+        else:
+            queue_thumbnails(avatar, [size])
+            urls[pk] = avatar.avatar.url
+            continue
+        sizes = known.get(pk, {})
+        sizes[size] = urls[pk]
+        updates[_urls_key(pk)] = sizes
+    if updates:
+        cache.set_many(updates, AVATARS['TIMEOUT'])
+    return urls
+
+
+def _avatar_saved(sender, instance, created=False, **kwargs):
+    # replaces avatar's own handler, which resizes inside the upload request
+    invalidate_cache(instance.user)
+    forget(instance.user_id)
+    if created:
+        queue_thumbnails(instance, AVATARS['SIZES'])
+
+
+def _avatar_changed(sender, instance=None, avatar=None, user=None, **kwargs):
+    forget(user.pk if user is not None else instance.user_id)
+
+
+signals.post_save.disconnect(create_default_thumbnails, sender=Avatar)
+signals.post_save.connect(_avatar_saved, sender=Avatar)
+signals.post_delete.connect(_avatar_changed, sender=Avatar)
+avatar_updated.connect(_avatar_changed)
+
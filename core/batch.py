@@ -0,0 +1,185 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.six import string_types
+
+from taggit.models import Tag
+
+from . import caching, search, userstats
+from .models import Question
+from .activity import dispatcher
+from .bulk import AuthorMap, TagMap, insert_questions, replace_tags, split_tags, \
+    update_questions
+from .indexing import update_index
+
+WRITABLE_FIELDS = ('question', 'details', 'section', 'answered')
+
+
+class QuestionBatch(object):
+    """
+    A list of ``{"op": "create" | "update", "id": ..., "data": {...}}``
+    operations, validated together and applied in one transaction.
+
+    ``data`` takes the writable fields, ``author`` (a username) and ``tags``
+    (a list or a comma separated string, replacing the question's tags on
+    update). Rows are written with bulk statements, so model signals don't
+    fire; activity, search and caches are updated once for the batch.
+
+    Given a ``user`` who isn't staff, questions are created as that user and
+    only their own questions can be updated.
+    """
+
+    def __init__(self, operations, user=None, max_operations=1000):
+        self.operations = operations
+        self.user = user
+        self.max_operations = max_operations
+        self._restricted = user is not None and not user.is_staff
+        self.results = []
+        self.errors = None
+        self._created, self._updated = [], []
+
+    def is_valid(self):
+        if not isinstance(self.operations, list) or \
+                not all(isinstance(op, dict) for op in self.operations):
+            self.errors = 'Expected a list of operations.'
+            return False
+        if len(self.operations) > self.max_operations:
+            self.errors = 'At most %d operations per batch.' % self.max_operations
+            return False
+
+        ids = set()
+        for op in self.operations:
+            try:
+                ids.add(int(op.get('id')))
+            except (TypeError, ValueError):
+                pass
+        existing = Question.objects.in_bulk(ids)
+        # anything else is reported by _validate
+        authors = [op['data'].get('author') for op in self.operations
+                   if isinstance(op.get('data'), dict)]
+        self._authors = AuthorMap().resolve(
+            author for author in authors if isinstance(author, string_types))
+
+        valid = True
+        for index, op in enumerate(self.operations):
+            errors = self._validate(op, existing)
+            self.results.append({'index': index, 'status': 'invalid' if errors else 'valid',
+                                 'errors': errors})
+            valid = valid and not errors
+        return valid
+
+    def _validate(self, op, existing):
+        data = op.get('data')
+        if not isinstance(data, dict):
+            return {'data': ['Expected an object.']}
+        errors = {}
+        if op.get('op') == 'create':
+            question = Question()
+            if self._restricted:
+                question.author_id = self.user.pk
+            elif 'author' not in data:
+                errors['author'] = ['This field is required.']
+        elif op.get('op') == 'update':
+            try:
+                question = existing.get(int(op.get('id')))
+            except (TypeError, ValueError):
+                question = None
+            if question is None:
+                return {'id': ['No question with this id.']}
+            if self._restricted and question.author_id != self.user.pk:
+                return {'id': ['You can only change your own questions.']}
+        else:
+            return {'op': ['Expected "create" or "update".']}
+
+        fields = [name for name in WRITABLE_FIELDS if name in data]
+        for name in fields:
+            setattr(question, name, data[name])
+        if 'author' in data:
+            author_id = self._authors.get(data['author']) \
+                if isinstance(data['author'], string_types) else None
+            if author_id is None:
+                errors['author'] = ['No user with this username.']
+            elif self._restricted and author_id != self.user.pk:
+                errors['author'] = ['You can only post as yourself.']
+            question.author_id = author_id
+            fields.append('author')
+        tags = None
+        if 'tags' in data:
+            tags = data['tags']
+            if isinstance(tags, (list, tuple)) and \
+                    all(isinstance(name, string_types) for name in tags) or \
+                    isinstance(tags, string_types):
+                tags = split_tags(tags)
+            else:
+                errors['tags'] = ['Expected a list of names or a comma separated string.']
+        try:
+            question.clean_fields(exclude=[field.name for field in Question._meta.fields
+                                           if field.name not in WRITABLE_FIELDS])
+        except ValidationError as e:
+            errors.update(e.message_dict)
+        if not errors:
+            if question.pk is None:
+                self._created.append((op, question, tags or []))
+            else:
+                self._updated.append((op, question, fields, tags))
+        return errors
+
+    def apply(self):
+        """
+        Writes the validated batch, fills in ``results`` and returns them.
+        """
+        created = [question for _, question, _ in self._created]
+        created_tags = [tags for _, _, tags in self._created]
+        updated = [question for _, question, _, _ in self._updated]
+        retagged = [(question, tags) for _, question, _, tags in self._updated
+                    if tags is not None]
+        tag_names = dict((question.pk, tags) for question, tags in retagged)
+
+        with transaction.atomic():
+            tag_map = TagMap()
+            insert_questions(created, created_tags, tag_map)
+            tag_names.update((question.pk, tags)
+                             for question, tags in zip(created, created_tags))
+            by_fields = defaultdict(list)
+            for _, question, fields, _ in self._updated:
+                by_fields[tuple(fields)].append(question)
+            for fields, questions in by_fields.items():
+                update_questions(questions, fields)
+            userstats.refresh(set(question.author_id for question in updated) |
+                              set(question._saved_stats[0] for question in updated))
+            attached = replace_tags([question for question, _ in retagged],
+                                    [tags for _, tags in retagged], tag_map)
+            questions = created + updated
+            search.index_questions(questions, [tag_names.get(question.pk)
+                                               for question in questions])
+
+        self._announce(created, created_tags, attached, tag_map)
+        if questions:
+            update_index(Question, [question.pk for question in questions])
+            caching.bump_questions([question.pk for question in questions])
+        if any(created_tags) or retagged:
+            caching.bump('tags')
+
+        statuses = dict((id(op), ('created', question)) for op, question, _ in self._created)
+        statuses.update((id(op), ('updated', question)) for op, question, _, _ in self._updated)
+        for result, op in zip(self.results, self.operations):
+            result['status'], question = statuses[id(op)]
+            result['id'] = question.pk
+        return self.results
+
+    def _announce(self, created, created_tags, attached, tag_map):
+        """
+        The actions the model signals would have sent, in one dispatcher flush.
+        """
+        authors = get_user_model().objects.in_bulk(
+            set(question.author_id for question in created))
+        tag_ids = [tag_map.ids[name] for tags in created_tags for name in set(tags)]
+        tag_ids.extend(item.tag_id for item in attached)
+        tags = Tag.objects.in_bulk(set(tag_ids))
+        for question in created:
+            dispatcher.send(authors[question.author_id], verb='asked a question')
+        for tag_id in tag_ids:
+            dispatcher.send(tags[tag_id], verb='new question')
+        dispatcher.flush()
@@ -0,0 +1,73 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, F
+
+from bookmarks.models import Bookmark
+
+
+def bookmarked_ids(user, model, pks):
+    """
+    Which of ``pks`` of ``model`` the user has bookmarked, in one query.
+    """
+    if not user.is_authenticated() or not pks:
+        return set()
+    return set(Bookmark.objects.filter(
+        user=user, content_type=ContentType.objects.get_for_model(model),
+        object_id__in=list(pks)).values_list('object_id', flat=True))
+
+
+def resolve(bookmarks):
+    """
+    Sets ``content_object`` on each bookmark with one query per content type
+    instead of one per bookmark. Bookmarks of deleted objects are dropped.
+    """
+    from .models import Question
+
+    bookmarks = list(bookmarks)
+    by_type = defaultdict(set)
+    for bookmark in bookmarks:
+        by_type[bookmark.content_type_id].add(bookmark.object_id)
+    objects = {}
+    for content_type_id, ids in by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        queryset = model._default_manager.all()
+        if model is Question:
+            queryset = queryset.select_related('author')
+        objects[content_type_id] = queryset.in_bulk(ids)
+    resolved = []
+    for bookmark in bookmarks:
+        obj = objects[bookmark.content_type_id].get(bookmark.object_id)
+        if obj is not None:
+            bookmark.content_object = obj
+            resolved.append(bookmark)
+    return resolved
+
+
+def add_count(question_id, delta):
+    from .models import Question
+
+    Question.objects.filter(pk=question_id) \
+        .update(bookmark_count=F('bookmark_count') + delta)
+
+
+def recount(chunk_size=500):
+    """
+    Recomputes every question's ``bookmark_count``, returns the number of
+    rows that had drifted.
+    """
+    from .models import Question
+
+    bookmarks = Bookmark.objects.filter(
+        content_type=ContentType.objects.get_for_model(Question))
+    by_count = defaultdict(list)
+    for pk, count in bookmarks.values_list('object_id').annotate(Count('pk')):
+        by_count[count].append(pk)
+    updated = 0
+    for count, pks in by_count.items():
+        for i in range(0, len(pks), chunk_size):
+            updated += Question.objects.filter(pk__in=pks[i:i + chunk_size]) \
+                .exclude(bookmark_count=count).update(bookmark_count=count)
+    updated += Question.objects.exclude(pk__in=bookmarks.values('object_id')) \
+        .exclude(bookmark_count=0).update(bookmark_count=0)
+    return updated
@@ -0,0 +1,191 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router
+from django.utils import timezone
+
+from taggit.models import Tag, TaggedItem
+
+from . import hotness, tagstats, userstats
+from .slugs import assign_slugs
+
+
+def split_tags(value):
+    """
+    Tag names from a list or a comma separated string.
+    """
+    if isinstance(value, (list, tuple)):
+        return [name.strip() for name in value if name.strip()]
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def allocate_ids(model, count):
+    """
+    Reserves ``count`` primary keys, bulk inserts don't return them in this
+    Django version.
+
+    PostgreSQL takes them from the table's sequence. Elsewhere they follow the
+    current maximum, which is only safe while nobody else inserts into the
+    table, call it inside the transaction that does the insert.
+    """
+    if not count:
+        return []
+    using = router.db_for_write(model)
+    connection = connections[using]
+    table = model._meta.db_table
+    pk_column = model._meta.pk.column
+    cursor = connection.cursor()
+    if connection.vendor == 'postgresql':
+        cursor.execute("SELECT nextval(pg_get_serial_sequence(%%s, %%s)) "
+                       "FROM generate_series(1, %d)" % count, [table, pk_column])
+        return [row[0] for row in cursor.fetchall()]
+    cursor.execute('SELECT MAX(%s) FROM %s' % (
+        connection.ops.quote_name(pk_column), connection.ops.quote_name(table)))
+    start = (cursor.fetchone()[0] or 0) + 1
+    return list(range(start, start + count))
+
+
+class AuthorMap(object):
+    """
+    username -> user id, loaded in batches and kept in memory.
+    """
+
+    def __init__(self, create_missing=False):
+        self.ids = {}
+        self.create_missing = create_missing
+
+    def resolve(self, usernames):
+        User = get_user_model()
+        wanted = set(username for username in usernames if username) - set(self.ids)
+        if wanted:
+            self.ids.update(User.objects.filter(username__in=wanted)
+                            .values_list('username', 'pk'))
+        if self.create_missing:
+            for username in wanted - set(self.ids):
+                user = User(username=username)
+                user.set_unusable_password()
+                user.save()
+                self.ids[username] = user.pk
+        return self.ids
+
+
+class TagMap(object):
+    """
+    tag name -> Tag id, loaded in batches and kept in memory. Missing tags are
+    created one by one so taggit can sort out slug clashes.
+    """
+
+    def __init__(self):
+        self.ids = {}
+
+    def resolve(self, names):
+        wanted = set(name for name in names if name) - set(self.ids)
+        if wanted:
+            self.ids.update(Tag.objects.filter(name__in=wanted)
+                            .values_list('name', 'pk'))
+            for name in wanted - set(self.ids):
+                self.ids[name] = Tag.objects.create(name=name).pk
+        return self.ids
+
+
+def insert_questions(questions, tag_names, tag_map):
+    """
+    Inserts unsaved questions and their tags with one INSERT per table.
+
+    No ``save()`` is called and no signals are sent, so activity, ratings,
+    search indexes and the listing caches are left to the caller. ``tag_names`` is a list of tag name
+    lists, parallel to ``questions``. Must run inside a transaction.
+    """
+    from .models import Question
+
+    now = timezone.now()
+    assign_slugs([question for question in questions if not question.slug])
+    for question, pk in zip(questions, allocate_ids(Question, len(questions))):
+        question.pk = pk
+        if question.pub_date is None:
+            question.pub_date = now
+        question.hotness = hotness.score(question.rating, question.views,
+                                         question.answered, question.pub_date)
+    # raw, like loaddata: keeps pub_date instead of applying auto_now_add
+    using = router.db_for_write(Question)
+    fields = Question._meta.local_concrete_fields
+    batch_size = max(connections[using].ops.bulk_batch_size(fields, questions), 1)
+    for i in range(0, len(questions), batch_size):
+        Question._base_manager._insert(questions[i:i + batch_size],
+                                       fields=fields, using=using, raw=True)
+
+    tag_ids = tag_map.resolve(set(name for names in tag_names for name in names))
+    content_type = ContentType.objects.get_for_model(Question)
+    items = [TaggedItem(tag_id=tag_ids[name], content_type=content_type,
+                        object_id=question.pk)
+             for question, names in zip(questions, tag_names)
+             for name in set(names)]
+    TaggedItem.objects.bulk_create(items)
+    tagstats.add_counts(Counter(item.tag_id for item in items))
+    userstats.refresh(set(question.author_id for question in questions))
+    return questions
+
+
+def update_questions(questions, fields):
+    """
+    Writes ``fields`` of saved questions, plus a new slug if the title is one
+    of them, with one batched UPDATE; the counters are left alone and the
+    hotness is rescored from the stored ones. Like ``insert_questions`` no
+    signals are sent.
+    """
+    from .models import Question
+
+    using = router.db_for_write(Question)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    fields = tuple(fields)
+    if 'question' in fields:
+        assign_slugs(questions)
+        fields += ('slug',)
+    model_fields = [Question._meta.get_field(name) for name in fields]
+    sql = 'UPDATE %s SET %s WHERE %s = %%s' % (
+        qn(Question._meta.db_table),
+        ', '.join('%s = %%s' % qn(field.column) for field in model_fields),
+        qn(Question._meta.pk.column))
+    params = []
+    for question in questions:
+        params.append([field.get_db_prep_save(getattr(question, field.attname), connection)
+                       for field in model_fields] + [question.pk])
+    connection.cursor().executemany(sql, params)
+    if 'answered' in fields:
+        # scored from the stored counters, the instances' may be stale
+        hotness.refresh([question.pk for question in questions])
+
+
+def replace_tags(questions, tag_names, tag_map):
+    """
+    Makes ``tag_names`` the tags of saved questions with one DELETE and one
+    INSERT. Returns the newly attached ``TaggedItem``s. Must run inside a
+    transaction.
+    """
+    from .models import Question
+
+    content_type = ContentType.objects.get_for_model(Question)
+    tag_ids = tag_map.resolve(set(name for names in tag_names for name in names))
+    wanted = dict((question.pk, set(tag_ids[name] for name in names))
+                  for question, names in zip(questions, tag_names))
+    stale, counts = [], Counter()
+    for pk, question_id, tag_id in TaggedItem.objects.filter(
+            content_type=content_type, object_id__in=list(wanted)) \
+            .values_list('pk', 'object_id', 'tag_id'):
+        if tag_id in wanted[question_id]:
+            wanted[question_id].discard(tag_id)
+        else:
+            stale.append(pk)
+            counts[tag_id] -= 1
+    if stale:
+        # like the inserts, skips the per-item delete signals
+        TaggedItem.objects.filter(pk__in=stale)._raw_delete(
+            using=router.db_for_write(TaggedItem))
+    items = [TaggedItem(tag_id=tag_id, content_type=content_type, object_id=pk)
+             for pk, tag_ids in wanted.items() for tag_id in tag_ids]
+    TaggedItem.objects.bulk_create(items)
+    counts.update(item.tag_id for item in items)
+    tagstats.add_counts(dict((tag_id, n) for tag_id, n in counts.items() if n))
+    return items
@@ -0,0 +1,120 @@
+import hashlib
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import get_cache
+from django.http import HttpResponse
+
+
+PAGE_CACHE = {
+    'CACHE': 'default',
+    'TIMEOUT': 60 * 60,
+}
+PAGE_CACHE.update(getattr(settings, 'PAGE_CACHE', {}))
+
+cache = get_cache(PAGE_CACHE['CACHE'])
+
+
+def _version_key(name):
+    return 'version:%s' % name
+
+
+def _modified_key(name):
+    return 'modified:%s' % name
+
+
+def get_versions(*names):
+    """
+    Current value of each version counter. A counter the cache has lost
+    restarts from the clock, so it can't come back to a value an older
+    cached page was stored under.
+    """
+    keys = [_version_key(name) for name in names]
+    found = cache.get_many(keys)
+    versions = []
+    for name, key in zip(names, keys):
+        if key not in found:
+            cache.add(key, int(time.time() * 1000), None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+def bump(*names):
+    for name in names:
+        try:
+            cache.incr(_version_key(name))
+        except ValueError:
+            get_versions(name)
+    now = time.time()
+    cache.set_many(dict((_modified_key(name), now) for name in names), None)
+
+
+def last_modified(*names):
+    """
+    UTC time of the latest bump of any of the counters, ``None`` when the
+    cache doesn't remember one of them.
+    """
+    found = cache.get_many([_modified_key(name) for name in names])
+    if len(found) < len(names):
+        return None
+    return datetime.utcfromtimestamp(max(found.values()))
+
+
+def etag(request, *names):
+    """
+    Validator for a response that only depends on the request and the
+    ``names`` counters.
+    """
+    parts = [request.get_full_path(), request.META.get('HTTP_ACCEPT', '')]
+    parts.extend(str(version) for version in get_versions(*names))
+    return hashlib.md5(':'.join(parts).encode('utf-8')).hexdigest()
+
+
+def bump_questions(pks):
+    """
+    Invalidates the rows of ``pks`` and every question listing.
+    """
+    bump('questions', *['question:%s' % pk for pk in pks])
+
+
+def attach_row_versions(questions):
+    """
+    Sets ``cache_version`` on each question, for the row fragments of
+    question_list.html.
+    """
+    versions = get_versions(*['question:%s' % question.pk for question in questions])
+    for question, version in zip(questions, versions):
+        question.cache_version = version
+    return questions
+
+
+class CachedListingMixin(object):
+    """
+    Serves anonymous requests from a full-page cache keyed on the listing,
+    its arguments, the cursor or page and the ``cache_versions`` counters.
+    """
+    cache_versions = ('questions', 'avatars')
+
+    def get_cache_key(self, request):
+        parts = [request.path, request.GET.get('cursor', ''), request.GET.get('page', '')]
+        parts.extend(str(version) for version in get_versions(*self.cache_versions))
+        digest = hashlib.md5(':'.join(parts).encode('utf-8')).hexdigest()
+        return 'page:%s:%s' % (self.__class__.__name__, digest)
+
+    def is_cacheable(self, request):
+        return not request.user.is_authenticated() and not request.GET.get('q')
+
+    def get(self, request, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return super(CachedListingMixin, self).get(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super(CachedListingMixin, self).get(request, *args, **kwargs)
+        response.render()
+        if response.status_code == 200:
+            cache.set(key, response.content, PAGE_CACHE['TIMEOUT'])
+        return response
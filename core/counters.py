@@ -0,0 +1,209 @@
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import get_cache
+from django.db import transaction
+from django.db.models import F
+from django.utils.module_loading import import_by_path
+
+
+VIEW_COUNTER = {
+    'BACKEND': 'core.counters.LocalBuffer',
+    'CACHE': 'default',
+    'FLUSH_INTERVAL': 30,
+    'FLUSH_THRESHOLD': 500,
+}
+VIEW_COUNTER.update(getattr(settings, 'VIEW_COUNTER', {}))
+
+
+class LocalBuffer(object):
+    """
+    Per-process buffer of pending increments.
+    """
+
+    def __init__(self, options):
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, pk, n=1):
+        with self._lock:
+            self._counts[pk] += n
+
+    def pending(self, pk):
+        return self._counts.get(pk, 0)
+
+    def size(self):
+        return len(self._counts)
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+        return dict(counts)
+
+
+class CacheBuffer(object):
+    """
+    Buffer shared between processes through the django cache.
+
+    Counters are plain cache integers, so ``incr``/``decr`` have to be atomic
+    in the configured backend (memcached, redis). Drain only subtracts what it
+    has read, hits that land in between stay for the next flush. Emptied
+    counters leave the index and rejoin it on their next hit; one that
+    couldn't rejoin for lock contention is retried on this process's next
+    drain.
+    """
+    prefix = 'views'
+
+    def __init__(self, options):
+        self.cache = get_cache(options['CACHE'])
+        self._unindexed = set()
+        self._lock = threading.Lock()
+
+    def _key(self, pk):
+        return '%s:%s' % (self.prefix, pk)
+
+    def _index(self):
+        return self.cache.get('%s:index' % self.prefix) or set()
+
+    def _update_index(self, add=(), remove=()):
+        """
+        Returns False if the index lock couldn't be taken.
+        """
+        lock = '%s:lock' % self.prefix
+        for _ in range(50):
+            if self.cache.add(lock, 1, 5):
+                try:
+                    if remove:
+                        # a hit may have refilled a counter since it was drained,
+                        # its add() is waiting on this lock to put it back
+                        values = self.cache.get_many([self._key(pk) for pk in remove])
+                        remove = [pk for pk in remove if not values.get(self._key(pk))]
+                    index = (self._index() | set(add)) - set(remove)
+                    self.cache.set('%s:index' % self.prefix, index, None)
+                finally:
+                    self.cache.delete(lock)
+                return True
+            time.sleep(0.01)
+        return False
+
+    def add(self, pk, n=1):
+        key = self._key(pk)
+        try:
+            value = self.cache.incr(key, n)
+        except ValueError:
+            value = n if self.cache.add(key, n, None) else self.cache.incr(key, n)
+        if value == n:
+            # the counter was empty, so it may not be in the index, and
+            # later hits won't try again
+            if not self._update_index(add=[pk]):
+                with self._lock:
+                    self._unindexed.add(pk)
+
+    def pending(self, pk):
+        return self.cache.get(self._key(pk)) or 0
+
+    def size(self):
+        return len(self._index())
+
+    def drain(self):
+        with self._lock:
+            unindexed, self._unindexed = self._unindexed, set()
+        if unindexed and not self._update_index(add=unindexed):
+            with self._lock:
+                self._unindexed |= unindexed
+        # two processes draining at once would both subtract the same values
+        lock = '%s:drain' % self.prefix
+        if not self.cache.add(lock, 1, 60):
+            return {}
+        try:
+            return self._drain()
+        finally:
+            self.cache.delete(lock)
+
+    def _drain(self):
+        index = self._index()
+        if not index:
+            return {}
+        keys = dict((self._key(pk), pk) for pk in index)
+        values = self.cache.get_many(list(keys))
+        counts = {}
+        emptied = [pk for key, pk in keys.items() if not values.get(key)]
+        for key, value in values.items():
+            if value:
+                if self.cache.decr(key, value) == 0:
+                    emptied.append(keys[key])
+                counts[keys[key]] = value
+        self._update_index(remove=emptied)
+        return counts
+
+
+class ViewCounter(object):
+    """
+    Write-behind counter for ``Question.views``.
+
+    Hits are buffered and written with one ``UPDATE ... SET views = views + n``
+    per distinct increment, so page views never go through ``Question.save()``.
+    """
+
+    def __init__(self, options=VIEW_COUNTER):
+        self.buffer = import_by_path(options['BACKEND'])(options)
+        self.flush_interval = options['FLUSH_INTERVAL']
+        self.flush_threshold = options['FLUSH_THRESHOLD']
+        self.last_flush = time.time()
+        self._flush_lock = threading.Lock()
+
+    def hit(self, pk, n=1):
+        self.buffer.add(pk, n)
+        if (time.time() - self.last_flush >= self.flush_interval or
+                self.buffer.size() >= self.flush_threshold):
+            self.flush()
+
+    def pending(self, pk):
+        return self.buffer.pending(pk)
+
+    def flush(self):
+        """
+        Drains the buffer into the database, returns the number of views written.
+        """
+        from .caching import bump_questions
+        from .hotness import refresh as refresh_hotness
+        from .userstats import add_views as add_author_views
+        from .models import Question
+
+        if not self._flush_lock.acquire(False):
+            return 0
+        try:
+            self.last_flush = time.time()
+            counts = self.buffer.drain()
+            by_increment = defaultdict(list)
+            for pk, n in counts.items():
+                by_increment[n].append(pk)
+            try:
+                with transaction.atomic():
+                    for n, pks in by_increment.items():
+                        Question.objects.filter(pk__in=pks).update(views=F('views') + n)
+                    refresh_hotness(counts)
+                    add_author_views(counts)
+            except Exception:
+                for pk, n in counts.items():
+                    self.buffer.add(pk, n)
+                raise
+            if counts:
+                bump_questions(counts)
+            return sum(counts.values())
+        finally:
+            self._flush_lock.release()
+
+
+view_counter = ViewCounter()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        view_counter.flush()
+    except Exception:
+        pass
@@ -0,0 +1,8 @@
+from django.db.backends.postgresql_psycopg2.base import *  # NOQA
+from django.db.backends.postgresql_psycopg2.base import DatabaseWrapper as BaseWrapper
+
+from core.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, BaseWrapper):
+    pass
@@ -0,0 +1,16 @@
+from django.db.backends.sqlite3.base import *  # NOQA
+from django.db.backends.sqlite3.base import DatabaseWrapper as BaseWrapper
+
+from core.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, BaseWrapper):
+    """
+    For trying the pool locally. An in-memory database only lives as long
+    as its one connection, so it isn't pooled.
+    """
+
+    def get_new_connection(self, conn_params):
+        if self.settings_dict['NAME'] == ':memory:':
+            return BaseWrapper.get_new_connection(self, conn_params)
+        return super(DatabaseWrapper, self).get_new_connection(conn_params)
@@ -0,0 +1,161 @@
+import threading
+import time
+
+from django.conf import settings
+
+
+DB_POOL = {
+    'MAX_SIZE': 10,
+    # seconds before a connection is replaced, None keeps it forever
+    'MAX_AGE': 600,
+    # seconds to wait for a free connection when MAX_SIZE are checked out
+    'TIMEOUT': 10,
+    # connections idle longer than this are checked with a query on checkout
+    'CHECK_INTERVAL': 30,
+}
+DB_POOL.update(getattr(settings, 'DB_POOL', {}))
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool(object):
+    """
+    Driver connections shared by every thread of the process. ``connect``
+    opens a new one.
+    """
+
+    def __init__(self, connect, options=DB_POOL):
+        self._connect = connect
+        self.max_size = options['MAX_SIZE']
+        self.max_age = options['MAX_AGE']
+        self.timeout = options['TIMEOUT']
+        self.check_interval = options['CHECK_INTERVAL']
+        self._idle = []  # (connection, opened, last used)
+        self._opened = {}  # id(connection) -> opened, for the checked out ones
+        self._size = 0
+        self._cond = threading.Condition()
+        self.stats = {'checkouts': 0, 'opened': 0, 'reconnects': 0, 'expired': 0,
+                      'timeouts': 0, 'wait_time': 0.0, 'max_wait': 0.0}
+
+    def _expired(self, opened):
+        return self.max_age is not None and time.time() - opened > self.max_age
+
+    def _usable(self, connection):
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def checkout(self):
+        started = time.time()
+        connection = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection, opened, used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = started + self.timeout - time.time()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise PoolTimeout('No database connection free after %ss' % self.timeout)
+                self._cond.wait(remaining)
+            waited = time.time() - started
+            self.stats['checkouts'] += 1
+            self.stats['wait_time'] += waited
+            self.stats['max_wait'] = max(self.stats['max_wait'], waited)
+
+        # the slot is ours, check or open outside the lock
+        if connection is not None:
+            if self._expired(opened):
+                self.stats['expired'] += 1
+            elif time.time() - used > self.check_interval and not self._usable(connection):
+                self.stats['reconnects'] += 1
+            else:
+                self._opened[id(connection)] = opened
+                return connection
+            self._close(connection)
+        try:
+            connection = self._connect()
+        except Exception:
+            self._release()
+            raise
+        self.stats['opened'] += 1
+        self._opened[id(connection)] = time.time()
+        return connection
+
+    def checkin(self, connection):
+        opened = self._opened.pop(id(connection), 0)
+        try:
+            # leaves no transaction open for the next borrower
+            connection.rollback()
+        except Exception:
+            self._close(connection)
+            self._release()
+            return
+        if self._expired(opened):
+            self.stats['expired'] += 1
+            self._close(connection)
+            self._release()
+            return
+        with self._cond:
+            self._idle.append((connection, opened, time.time()))
+            self._cond.notify()
+
+    def _release(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def snapshot(self):
+        with self._cond:
+            stats = dict(self.stats, size=self._size, idle=len(self._idle),
+                         in_use=self._size - len(self._idle), max_size=self.max_size)
+        stats['mean_wait'] = stats['wait_time'] / stats['checkouts'] if stats['checkouts'] else 0
+        return stats
+
+
+pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, options=None):
+    """
+    The pool of the ``alias`` database, created on first use. ``options``
+    override ``DB_POOL`` for it.
+    """
+    with _pools_lock:
+        if alias not in pools:
+            pools[alias] = ConnectionPool(connect, dict(DB_POOL, **(options or {})))
+        return pools[alias]
+
+
+class PooledDatabaseWrapperMixin(object):
+    """
+    Makes a backend borrow its connections from the process pool and hand
+    them back on close. Use with ``CONN_MAX_AGE = 0`` so Django closes them
+    at the end of every request.
+    """
+
+    def get_new_connection(self, conn_params):
+        parent = super(PooledDatabaseWrapperMixin, self).get_new_connection
+        pool = get_pool(self.alias, lambda: parent(conn_params),
+                        self.settings_dict.get('POOL'))
+        return pool.checkout()
+
+    def _close(self):
+        if self.connection is not None:
+            pools[self.alias].checkin(self.connection)
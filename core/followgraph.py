@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from actstream.models import Follow
+
+from .caching import cache
+
+FOLLOW_GRAPH = {
+    'TIMEOUT': 60 * 60,
+}
+FOLLOW_GRAPH.update(getattr(settings, 'FOLLOW_GRAPH', {}))
+
+
+def _followees_key(user_id, content_type_id):
+    return 'followees:%s:%s' % (user_id, content_type_id)
+
+
+def followee_ids(user, model):
+    """
+    Ids, as strings like ``Follow.object_id``, of the ``model`` objects the
+    user follows. Cached until they follow or unfollow something of that type.
+    """
+    if not user.is_authenticated():
+        return set()
+    content_type = ContentType.objects.get_for_model(model)
+    key = _followees_key(user.pk, content_type.pk)
+    ids = cache.get(key)
+    if ids is None:
+        ids = set(Follow.objects.filter(user=user, content_type=content_type)
+                  .values_list('object_id', flat=True))
+        cache.set(key, ids, FOLLOW_GRAPH['TIMEOUT'])
+    return ids
+
+
+def following(user, objects):
+    """
+    Which of ``objects`` the user follows, as a set of ``(model, pk)``; one
+    cache lookup per model.
+    """
+    followed = set()
+    for model in set(type(obj) for obj in objects):
+        ids = followee_ids(user, model)
+        followed.update((model, obj.pk) for obj in objects
+                        if type(obj) is model and str(obj.pk) in ids)
+    return followed
+
+
+def followees(user, model):
+    """
+    The ``model`` objects the user follows.
+    """
+    return model._default_manager.filter(pk__in=list(followee_ids(user, model)))
+
+
+def followers(obj):
+    """
+    Users following ``obj``.
+    """
+    return get_user_model().objects.filter(pk__in=Follow.objects.filter(
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=str(obj.pk)).values('user_id'))
+
+
+def follower_counts(objects):
+    """
+    ``{pk: followers}`` for objects of one model, in one query.
+    """
+    from .models import FollowStats
+
+    objects = list(objects)
+    if not objects:
+        return {}
+    counts = dict(FollowStats.objects.filter(
+        content_type=ContentType.objects.get_for_model(objects[0]),
+        object_id__in=[str(obj.pk) for obj in objects]).values_list('object_id', 'followers'))
+    return dict((obj.pk, counts.get(str(obj.pk), 0)) for obj in objects)
+
+
+def follow_changed(follow, delta):
+    """
+    Drops the follower's cached followees and moves the followed object's
+    count by ``delta``.
+    """
+    from .models import FollowStats
+
+    cache.delete(_followees_key(follow.user_id, follow.content_type_id))
+    lookup = {'content_type_id': follow.content_type_id, 'object_id': follow.object_id}
+    if FollowStats.objects.filter(**lookup).update(followers=F('followers') + delta):
+        return
+    try:
+        with transaction.atomic():
+            FollowStats.objects.create(followers=max(delta, 0), **lookup)
+    except IntegrityError:
+        FollowStats.objects.filter(**lookup).update(followers=F('followers') + delta)
+
+
+def rebuild():
+    """
+    Recomputes every follower count from the follow table.
+    """
+    from .models import FollowStats
+
+    rows = [FollowStats(content_type_id=content_type_id, object_id=object_id, followers=n)
+            for content_type_id, object_id, n in Follow.objects.values_list(
+                'content_type_id', 'object_id').annotate(Count('pk'))]
+    with transaction.atomic():
+        FollowStats.objects.all().delete()
+        FollowStats.objects.bulk_create(rows)
+    return len(rows)
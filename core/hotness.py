@@ -0,0 +1,71 @@
+import math
+from calendar import timegm
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+
+HOTNESS = {
+    # seconds of age worth one order of magnitude of weight
+    'GRAVITY': 45000,
+    'VIEW_WEIGHT': 0.02,
+    'ANSWERED_BONUS': 5,
+    'CHUNK_SIZE': 1000,
+}
+HOTNESS.update(getattr(settings, 'HOTNESS', {}))
+
+# scores count from here so they stay small
+EPOCH = 1388534400  # 2014-01-01 UTC
+
+
+def score(rating, views, answered, pub_date):
+    """
+    Signed log10 of the question's weight plus its publication time in
+    ``GRAVITY`` units. Newer questions start higher instead of older ones
+    decaying, so a stored score only changes when its inputs do.
+    """
+    weight = rating + views * HOTNESS['VIEW_WEIGHT']
+    if answered:
+        weight += HOTNESS['ANSWERED_BONUS']
+    sign = (weight > 0) - (weight < 0)
+    age = timegm(pub_date.utctimetuple()) - EPOCH
+    return round(sign * math.log10(max(abs(weight), 1)) + age / float(HOTNESS['GRAVITY']), 7)
+
+
+def _write(model, rows):
+    using = router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    sql = 'UPDATE %s SET %s = %%s WHERE %s = %%s' % (
+        qn(model._meta.db_table), qn('hotness'), qn(model._meta.pk.column))
+    with transaction.atomic(using=using):
+        connection.cursor().executemany(
+            sql, [(score(*row[1:]), row[0]) for row in rows])
+
+
+def refresh(pks=None, chunk_size=None):
+    """
+    Rescores ``pks``, or every question, with one SELECT and one batched
+    UPDATE per chunk. Returns the number of questions scored.
+    """
+    from .models import Question
+
+    chunk_size = chunk_size or HOTNESS['CHUNK_SIZE']
+    fields = ('pk', 'rating', 'views', 'answered', 'pub_date')
+    queryset = Question.objects.order_by('pk').values_list(*fields)
+    count = 0
+    if pks is not None:
+        pks = sorted(set(pks))
+        for i in range(0, len(pks), chunk_size):
+            rows = list(queryset.filter(pk__in=pks[i:i + chunk_size]))
+            _write(Question, rows)
+            count += len(rows)
+        return count
+    last = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last)[:chunk_size])
+        if not rows:
+            return count
+        _write(Question, rows)
+        count += len(rows)
+        last = rows[-1][0]
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.db import models
+from django.utils.module_loading import import_by_path
+
+from haystack import connections, connection_router
+from haystack.exceptions import NotHandled
+from haystack.signals import BaseSignalProcessor
+from haystack.utils import get_identifier
+
+
+SEARCH_QUEUE = {
+    'BACKEND': 'core.workers.ThreadBackend',
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2,
+}
+SEARCH_QUEUE.update(getattr(settings, 'SEARCH_QUEUE', {}))
+
+
+def update_index(model, pks, batch_size=SEARCH_QUEUE['BATCH_SIZE']):
+    """
+    Sends ``pks`` of ``model`` to every search backend, ``batch_size`` at a time.
+    """
+    pks = list(pks)
+    index = connections['default'].get_unified_index().get_index(model)
+    for using in connection_router.for_write(index=index):
+        backend = connections[using].get_backend()
+        for i in range(0, len(pks), batch_size):
+            backend.update(index, index.index_queryset(using=using)
+                           .filter(pk__in=pks[i:i + batch_size]))
+
+
+class QueuedSignalProcessor(BaseSignalProcessor):
+    """
+    Replacement for ``RealtimeSignalProcessor`` that queues dirty objects and
+    indexes them in bulk, outside of the request. Changes to the same object
+    within a batch coalesce, the last one wins.
+
+    Saves that don't touch anything an index reads (``indexed_fields`` on the
+    index, e.g. a ``views`` bump) are not queued at all.
+    """
+
+    def setup(self):
+        self.queue = import_by_path(SEARCH_QUEUE['BACKEND'])(SEARCH_QUEUE, self.write,
+                                                            name='search-indexer')
+        self._indexed_models = None
+        models.signals.post_init.connect(self.handle_init)
+        models.signals.post_save.connect(self.handle_save)
+        models.signals.post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        models.signals.post_init.disconnect(self.handle_init)
+        models.signals.post_save.disconnect(self.handle_save)
+        models.signals.post_delete.disconnect(self.handle_delete)
+
+    def _index(self, model):
+        unified_index = self.connections['default'].get_unified_index()
+        if self._indexed_models is None:
+            self._indexed_models = set(unified_index.get_indexed_models())
+        if model not in self._indexed_models:
+            return None
+        try:
+            return unified_index.get_index(model)
+        except NotHandled:
+            return None
+
+    def _snapshot(self, index, instance):
+        return tuple(getattr(instance, name, None) for name in index.indexed_fields)
+
+    def handle_init(self, sender, instance, **kwargs):
+        index = self._index(sender)
+        if index is not None and hasattr(index, 'indexed_fields') and instance.pk:
+            instance._indexed_snapshot = self._snapshot(index, instance)
+
+    def handle_save(self, sender, instance, created=False, update_fields=None, **kwargs):
+        index = self._index(sender)
+        if index is None:
+            return
+        indexed_fields = getattr(index, 'indexed_fields', None)
+        if indexed_fields is not None and not created:
+            if update_fields is not None and not set(update_fields) & set(indexed_fields):
+                return
+            snapshot = self._snapshot(index, instance)
+            if snapshot == getattr(instance, '_indexed_snapshot', None):
+                return
+            instance._indexed_snapshot = snapshot
+        self.queue.put(('update', sender, instance.pk, None))
+
+    def handle_delete(self, sender, instance, **kwargs):
+        if self._index(sender) is not None:
+            self.queue.put(('remove', sender, instance.pk, get_identifier(instance)))
+
+    def write(self, changes):
+        """
+        Sends one bulk update per index and batch, then the removals.
+        """
+        updates, removes = set(), {}
+        for change, model, pk, identifier in changes:
+            if change == 'update':
+                updates.add((model, pk))
+                removes.pop((model, pk), None)
+            else:
+                updates.discard((model, pk))
+                removes[model, pk] = identifier
+        by_model = {}
+        for model, pk in updates:
+            by_model.setdefault(model, []).append(pk)
+        for model, pks in by_model.items():
+            update_index(model, pks)
+        for using in self.connection_router.for_write():
+            backend = self.connections[using].get_backend()
+            for identifier in removes.values():
+                backend.remove(identifier)
+
+    def flush(self):
+        return self.queue.flush()
@@ -0,0 +1,125 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+
+REQUEST_STATS = {
+    'SAMPLE_RATE': 0.1,
+    'N_PLUS_ONE_THRESHOLD': 5,
+}
+REQUEST_STATS.update(getattr(settings, 'REQUEST_STATS', {}))
+
+# bucket upper bounds, milliseconds for timings and plain counts for queries
+MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_in_lists = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+
+
+def normalize_sql(sql):
+    """
+    SQL with its literals replaced by ``?``, to spot the same query running
+    with different parameters.
+    """
+    return _in_lists.sub('(?)', _literals.sub('?', sql))
+
+
+class Histogram(object):
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.count = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction):
+        """
+        Upper bound of the bucket holding the percentile.
+        """
+        wanted = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            seen += count
+            if seen >= wanted and count:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'max': self.max,
+        }
+
+
+class ViewStats(object):
+
+    def __init__(self):
+        self.latency = Histogram(MS_BUCKETS)
+        self.db_time = Histogram(MS_BUCKETS)
+        self.template_time = Histogram(MS_BUCKETS)
+        self.queries = Histogram(COUNT_BUCKETS)
+        # normalized sql -> number of sampled requests that repeated it
+        self.repeated = defaultdict(int)
+
+    def as_dict(self):
+        return {
+            'latency_ms': self.latency.as_dict(),
+            'db_ms': self.db_time.as_dict(),
+            'template_ms': self.template_time.as_dict(),
+            'queries': self.queries.as_dict(),
+            'n_plus_one': sorted(
+                ({'sql': sql, 'requests': count} for sql, count in self.repeated.items()),
+                key=lambda item: -item['requests']),
+        }
+
+
+class RequestStats(object):
+    """
+    In-process aggregates of the sampled requests, per view.
+    """
+
+    def __init__(self, threshold=REQUEST_STATS['N_PLUS_ONE_THRESHOLD']):
+        self.threshold = threshold
+        self.views = defaultdict(ViewStats)
+        self._lock = threading.Lock()
+
+    def record(self, view, latency, template_time, queries):
+        repeated = defaultdict(int)
+        for query in queries:
+            repeated[normalize_sql(query['sql'])] += 1
+        db_time = sum(float(query['time']) for query in queries) * 1000
+        with self._lock:
+            stats = self.views[view]
+            stats.latency.add(latency)
+            stats.db_time.add(db_time)
+            stats.template_time.add(template_time)
+            stats.queries.add(len(queries))
+            for sql, count in repeated.items():
+                if count >= self.threshold:
+                    stats.repeated[sql] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict((view, stats.as_dict()) for view, stats in self.views.items())
+
+    def reset(self):
+        with self._lock:
+            self.views.clear()
+
+
+request_stats = RequestStats()
@@ -0,0 +1,191 @@
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+from optparse import make_option
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, \
+    teardown_test_environment
+from django.utils import timezone
+
+from actstream.models import Action, Follow
+from secretballot.models import Vote
+
+from core import hotness, ratings
+from core.bulk import TagMap, insert_questions
+from core.models import Question
+
+PASSWORD = 'benchmark'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Seeds a synthetic dataset in a throwaway SQLite database and '
+            'measures the main pages. Run with --settings=toster.bench_settings.')
+    option_list = BaseCommand.option_list + (
+        make_option('--users', type='int', default=200),
+        make_option('--questions', type='int', default=5000),
+        make_option('--tags', type='int', default=100),
+        make_option('--votes', type='int', default=20000),
+        make_option('--actions', type='int', default=20000),
+        make_option('--requests', type='int', default=50,
+                    help='Timed requests per endpoint.'),
+        make_option('--seed', type='int', default=1),
+        make_option('--output', default='bench_output.json',
+                    help='Where to write the JSON results.'),
+    )
+
+    def handle(self, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The benchmark only runs on SQLite, '
+                               'use --settings=toster.bench_settings.')
+        from south.management.commands import patch_for_test_db_setup
+
+        random.seed(options['seed'])
+        setup_test_environment()
+        patch_for_test_db_setup()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            started = time.time()
+            user, question = self.seed(options)
+            self.stdout.write('seeded in %.1fs' % (time.time() - started))
+            results = self.run(user, question, options['requests'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'commit': self.commit(),
+            'python': platform.python_version(),
+            'date': timezone.now().isoformat(),
+            'dataset': dict((name, options[name]) for name in
+                            ('users', 'questions', 'tags', 'votes', 'actions')),
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+        for name, result in sorted(results.items()):
+            self.stdout.write('%-14s p50 %7.1fms  p95 %7.1fms  p99 %7.1fms  '
+                              '%3d queries  %6.0fKB' % (
+                                  name, result['p50_ms'], result['p95_ms'],
+                                  result['p99_ms'], result['queries'],
+                                  result['alloc_peak_kb']))
+
+    def commit(self):
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+                stderr=subprocess.STDOUT).decode('ascii').strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    @transaction.atomic
+    def seed(self, options):
+        User = get_user_model()
+        users = [User(username='user%d' % i, email='user%d@example.com' % i)
+                 for i in range(options['users'])]
+        users[0].set_password(PASSWORD)
+        User.objects.bulk_create(users)
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        user = User.objects.get(username='user0')
+
+        tag_names = ['tag%d' % i for i in range(options['tags'])]
+        now = timezone.now()
+        questions, question_tags = [], []
+        for i in range(options['questions']):
+            questions.append(Question(
+                question='Question number %d about %s' % (i, random.choice(tag_names)),
+                details='Some details for question %d. ' % i * 5,
+                section='general',
+                views=random.randint(0, 1000),
+                answered=random.random() < 0.3,
+                pub_date=now - timedelta(minutes=i),
+                author_id=random.choice(user_ids)))
+            question_tags.append(random.sample(tag_names, 3))
+        insert_questions(questions, question_tags, TagMap())
+        question_ids = [question.pk for question in questions]
+
+        question_type = ContentType.objects.get_for_model(Question)
+        user_type = ContentType.objects.get_for_model(User)
+        pairs = set()
+        while len(pairs) < min(options['votes'], len(question_ids) * 100):
+            pairs.add((random.choice(question_ids), 'token%d' % random.randint(0, 99)))
+        Vote.objects.bulk_create([
+            Vote(content_type=question_type, object_id=pk, token=token,
+                 vote=random.choice((1, 1, 1, -1)))
+            for pk, token in pairs])
+        ratings.reconcile()
+        hotness.refresh()
+
+        Follow.objects.bulk_create([
+            Follow(user=user, content_type=user_type, object_id=str(pk))
+            for pk in random.sample(user_ids, min(50, len(user_ids)))])
+        Action.objects.bulk_create([
+            Action(actor_content_type=user_type,
+                   actor_object_id=str(random.choice(user_ids)),
+                   verb='asked a question',
+                   action_object_content_type=question_type,
+                   action_object_object_id=str(random.choice(question_ids)),
+                   timestamp=now - timedelta(seconds=i))
+            for i in range(options['actions'])])
+        return user, Question.objects.get(pk=question_ids[0])
+
+    def run(self, user, question, count):
+        anonymous, member = Client(), Client()
+        if not member.login(username=user.username, password=PASSWORD):
+            raise CommandError('Could not log in the benchmark user.')
+        # after the warm-up request anonymous listings come from the page
+        # cache, members get them rendered
+        endpoints = [
+            ('question', anonymous, '/question/%s/%s' % (question.pk, question.slug)),
+            ('latest', member, '/questions/'),
+            ('popular', member, '/questions/popular/'),
+            ('hot', member, '/questions/hot/'),
+            ('tags', member, '/tags/'),
+            ('latest_cached', anonymous, '/questions/'),
+            ('feed', member, '/feed/'),
+            ('api', anonymous, '/api/questions/'),
+        ]
+        results = {}
+        for name, client, url in endpoints:
+            self.request(client, url)  # warm up caches and templates
+            timings, queries = [], []
+            for _ in range(count):
+                with CaptureQueriesContext(connection) as context:
+                    started = time.time()
+                    self.request(client, url)
+                    timings.append((time.time() - started) * 1000)
+                queries.append(len(context))
+            tracemalloc.start()
+            self.request(client, url)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[name] = {
+                'url': url,
+                'p50_ms': percentile(timings, 0.5),
+                'p95_ms': percentile(timings, 0.95),
+                'p99_ms': percentile(timings, 0.99),
+                'mean_ms': sum(timings) / len(timings),
+                'queries': max(queries),
+                'alloc_peak_kb': peak / 1024.0,
+            }
+        return results
+
+    def request(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError('%s returned %s' % (url, response.status_code))
+        return response
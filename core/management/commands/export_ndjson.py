@@ -0,0 +1,41 @@
+import json
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.export import EXPORTS, export_rows, watermark
+
+
+class Command(BaseCommand):
+    args = '<%s>' % '|'.join(EXPORTS)
+    help = ('Streams every row of a table as JSON lines, in id order. The '
+            'last id written is reported for the next --after-id.')
+    option_list = BaseCommand.option_list + (
+        make_option('--since', help='Only rows created at or after this ISO 8601 time.'),
+        make_option('--after-id', help='Only rows with a greater id.'),
+        make_option('--output', default='-', help='File to write, stdout by default.'),
+        make_option('--chunk-size', type='int', default=1000,
+                    help='Rows read per query.'),
+    )
+
+    def handle(self, kind=None, **options):
+        if kind not in EXPORTS:
+            raise CommandError('Export one of %s.' % ', '.join(EXPORTS))
+        try:
+            filters = watermark(options['since'], options['after_id'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['output'] == '-':
+            output = self.stdout
+        else:
+            output = open(options['output'], 'w')
+        count, last = 0, filters.get('after_id')
+        try:
+            for row in export_rows(kind, chunk_size=options['chunk_size'], **filters):
+                output.write(json.dumps(row, cls=DjangoJSONEncoder, sort_keys=True) + '\n')
+                count, last = count + 1, row['id']
+        finally:
+            if output is not self.stdout:
+                output.close()
+        self.stderr.write('%d %s exported, last id %s' % (count, kind, last))
@@ -0,0 +1,11 @@
+from django.core.management.base import NoArgsCommand
+
+from core.counters import view_counter
+
+
+class Command(NoArgsCommand):
+    help = 'Writes buffered question view counts to the database.'
+
+    def handle_noargs(self, **options):
+        written = view_counter.flush()
+        self.stdout.write('%d views flushed' % written)
@@ -0,0 +1,25 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from avatar.models import Avatar
+
+from core import avatars
+
+
+class Command(NoArgsCommand):
+    help = 'Generates the configured avatar thumbnail sizes for existing avatars.'
+    option_list = NoArgsCommand.option_list + (
+        make_option('--missing', action='store_true', dest='missing', default=False,
+                    help='Only generate thumbnails that are not in storage yet.'),
+    )
+
+    def handle_noargs(self, **options):
+        generated = 0
+        for avatar in Avatar.objects.select_related('user').iterator():
+            sizes = [size for size in avatars.AVATARS['SIZES']
+                     if not (options['missing'] and avatar.thumbnail_exists(size))]
+            if sizes:
+                avatars.generate(avatar.pk, sizes)
+                generated += 1
+        self.stdout.write('%d avatars resized' % generated)
@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+import sys
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from core.bulk import AuthorMap, TagMap, insert_questions, split_tags
+from core.caching import bump
+from core.indexing import update_index
+from core.models import Question
+from core.search import index_questions
+
+
+def read_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    for row in csv.DictReader(stream):
+        yield row
+
+
+def chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    args = '<file>'
+    help = ('Imports questions from a JSON lines or CSV file ("-" for stdin). '
+            'Rows have question, details, author (username) and optionally '
+            'tags, section, answered, views, rating and pub_date.')
+    option_list = BaseCommand.option_list + (
+        make_option('--format', choices=['jsonl', 'csv'],
+                    help='Input format, guessed from the file name by default.'),
+        make_option('--chunk-size', type='int', default=1000,
+                    help='Rows inserted per transaction.'),
+        make_option('--create-authors', action='store_true', default=False,
+                    help='Create users for unknown authors instead of skipping the row.'),
+        make_option('--no-index', action='store_true', default=False,
+                    help="Don't update the search indexes."),
+    )
+
+    def handle(self, path=None, **options):
+        if path is None:
+            raise CommandError('Give a file to import, "-" for stdin.')
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        if path == '-':
+            stream = sys.stdin
+        else:
+            stream = io.open(path, encoding='utf-8', newline='' if fmt == 'csv' else None)
+        reader = read_csv if fmt == 'csv' else read_jsonl
+
+        authors = AuthorMap(create_missing=options['create_authors'])
+        tags = TagMap()
+        imported, skipped, imported_ids = 0, 0, []
+        started = time.time()
+        try:
+            for rows in chunks(reader(stream), options['chunk_size']):
+                questions, tag_names = self.build(rows, authors)
+                skipped += len(rows) - len(questions)
+                with transaction.atomic():
+                    insert_questions(questions, tag_names, tags)
+                    if not options['no_index']:
+                        index_questions(questions, tag_names)
+                # after the commit, or a page rendered meanwhile is cached as new
+                bump('questions', 'tags')
+                imported += len(questions)
+                imported_ids.extend(question.pk for question in questions)
+                if int(options['verbosity']) > 1:
+                    self.stdout.write('%d rows, %.0f rows/s' % (
+                        imported, imported / (time.time() - started)))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if imported_ids and not options['no_index']:
+            update_index(Question, imported_ids)
+        elapsed = time.time() - started
+        self.stdout.write('%d questions imported, %d skipped in %.1fs (%.0f rows/s)' % (
+            imported, skipped, elapsed, imported / elapsed if elapsed else 0))
+
+    def build(self, rows, authors):
+        author_ids = authors.resolve(row.get('author') for row in rows)
+        questions, tag_names = [], []
+        for row in rows:
+            author_id = author_ids.get(row.get('author'))
+            if author_id is None or not row.get('question'):
+                continue
+            questions.append(Question(
+                question=row['question'],
+                details=row.get('details') or '',
+                section=row.get('section') or '',
+                answered=str(row.get('answered', '')).lower() in ('1', 'true', 'yes'),
+                views=int(row.get('views') or 0),
+                rating=int(row.get('rating') or 0),
+                pub_date=parse_datetime(row['pub_date']) if row.get('pub_date') else None,
+                author_id=author_id,
+            ))
+            tag_names.append(split_tags(row.get('tags')))
+        return questions, tag_names
@@ -0,0 +1,10 @@
+from django.core.management.base import NoArgsCommand
+
+from core import followgraph
+
+
+class Command(NoArgsCommand):
+    help = 'Recomputes follower counts from the follow table.'
+
+    def handle_noargs(self, **options):
+        self.stdout.write('%d followed objects counted' % followgraph.rebuild())
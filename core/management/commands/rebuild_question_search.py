@@ -0,0 +1,24 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from core.models import Question
+from core.search import index_questions
+
+
+class Command(NoArgsCommand):
+    help = 'Rebuilds the database search index of questions.'
+    option_list = NoArgsCommand.option_list + (
+        make_option('--chunk-size', type='int', default=500,
+                    help='Questions indexed per transaction.'),
+    )
+
+    def handle_noargs(self, **options):
+        chunk_size = options['chunk_size']
+        pks = list(Question.objects.order_by('pk').values_list('pk', flat=True))
+        for i in range(0, len(pks), chunk_size):
+            questions = list(Question.objects.filter(pk__in=pks[i:i + chunk_size])
+                             .prefetch_related('tags'))
+            index_questions(questions, [[tag.name for tag in question.tags.all()]
+                                        for question in questions])
+        self.stdout.write('%d questions indexed' % len(pks))
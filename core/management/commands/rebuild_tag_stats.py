@@ -0,0 +1,10 @@
+from django.core.management.base import NoArgsCommand
+
+from core import tagstats
+
+
+class Command(NoArgsCommand):
+    help = 'Recomputes the per-tag question counts from the tagged items.'
+
+    def handle_noargs(self, **options):
+        self.stdout.write('%d tags counted' % tagstats.rebuild())
@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.timeline import timelines
+
+
+class Command(BaseCommand):
+    args = '[username ...]'
+    help = 'Rebuilds cached activity feeds from the action table.'
+
+    def handle(self, *usernames, **options):
+        users = get_user_model().objects.filter(is_active=True)
+        if usernames:
+            users = users.filter(username__in=usernames)
+        count = 0
+        for user in users.iterator():
+            timelines.rebuild(user)
+            count += 1
+        self.stdout.write('%d timelines rebuilt' % count)
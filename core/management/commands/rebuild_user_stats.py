@@ -0,0 +1,16 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core import userstats
+
+
+class Command(BaseCommand):
+    args = '[username ...]'
+    help = 'Recomputes per-user question counters from the question table.'
+
+    def handle(self, *usernames, **options):
+        user_ids = None
+        if usernames:
+            user_ids = list(get_user_model().objects.filter(username__in=usernames)
+                            .values_list('pk', flat=True))
+        self.stdout.write('%d users counted' % userstats.refresh(user_ids))
@@ -0,0 +1,18 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from core import caching, hotness
+
+
+class Command(NoArgsCommand):
+    help = 'Rescores every question for the hot listing.'
+    option_list = NoArgsCommand.option_list + (
+        make_option('--chunk-size', type='int', default=hotness.HOTNESS['CHUNK_SIZE'],
+                    help='Questions per SELECT and UPDATE batch.'),
+    )
+
+    def handle_noargs(self, **options):
+        count = hotness.refresh(chunk_size=options['chunk_size'])
+        caching.bump('questions')
+        self.stdout.write('%d questions scored' % count)
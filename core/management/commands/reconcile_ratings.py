@@ -0,0 +1,17 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from core import ratings
+
+
+class Command(NoArgsCommand):
+    help = 'Recomputes question and user ratings from the vote table.'
+    option_list = NoArgsCommand.option_list + (
+        make_option('--chunk-size', type='int', default=500,
+                    help='Rows per UPDATE.'),
+    )
+
+    def handle_noargs(self, **options):
+        updated = ratings.reconcile(chunk_size=options['chunk_size'])
+        self.stdout.write('%d ratings corrected' % updated)
@@ -0,0 +1,17 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from core import bookmarking
+
+
+class Command(NoArgsCommand):
+    help = 'Recomputes question bookmark counts from the bookmark table.'
+    option_list = NoArgsCommand.option_list + (
+        make_option('--chunk-size', type='int', default=500,
+                    help='Rows per UPDATE.'),
+    )
+
+    def handle_noargs(self, **options):
+        updated = bookmarking.recount(chunk_size=options['chunk_size'])
+        self.stdout.write('%d bookmark counts corrected' % updated)
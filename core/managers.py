@@ -1,7 +1,8 @@
 # myapp/managers.py
-from datetime import datetime
-
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Manager
+from django.db.models.query import QuerySet
+from django.utils import timezone
 
 from actstream.managers import ActionManager, stream
 
@@ -10,5 +11,23 @@ class MyActionManager(ActionManager):
     @stream
     def mystream(self, obj, verb='posted', time=None):
         if time is None:
-            time = datetime.now()
+            time = timezone.now()
         return obj.actor_actions.filter(verb = verb, timestamp__lte = time)
+
+
+class QuestionQuerySet(QuerySet):
+
+    def for_listing(self):
+        """
+        Everything question_list.html touches per row, in two queries.
+        """
+        return self.select_related('author').prefetch_related('tags')
+
+
+class QuestionManager(Manager):
+
+    def get_queryset(self):
+        return QuestionQuerySet(self.model, using=self._db)
+
+    def for_listing(self):
+        return self.get_queryset().for_listing()
@@ -0,0 +1,78 @@
+import random
+import threading
+import time
+
+from django.db import connection
+from django.template.base import Template
+
+from .instrumentation import REQUEST_STATS, request_stats
+from .voting import VOTER_TOKEN, voter_token
+
+
+_state = threading.local()
+_template_render = Template.render
+
+
+def _timed_render(self, context):
+    # only the outermost render counts, includes and extends nest inside it
+    if not getattr(_state, 'active', False) or _state.depth:
+        return _template_render(self, context)
+    _state.depth += 1
+    started = time.time()
+    try:
+        return _template_render(self, context)
+    finally:
+        _state.template_time += time.time() - started
+        _state.depth -= 1
+
+Template.render = _timed_render
+
+
+class RequestStatsMiddleware(object):
+    """
+    Samples ``SAMPLE_RATE`` of the requests and records their latency, query
+    count, database and template time per view in ``request_stats``.
+
+    Sampled requests run with the debug cursor for their duration, the rest
+    pay for one ``random()`` call.
+    """
+
+    def process_request(self, request):
+        _state.active = random.random() < REQUEST_STATS['SAMPLE_RATE']
+        if not _state.active:
+            return
+        _state.depth = 0
+        _state.template_time = 0
+        _state.view = None
+        _state.debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        _state.first_query = len(connection.queries)
+        _state.started = time.time()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(_state, 'active', False):
+            _state.view = '%s.%s' % (view_func.__module__, view_func.__name__)
+
+    def process_response(self, request, response):
+        if not getattr(_state, 'active', False):
+            return response
+        _state.active = False
+        latency = (time.time() - _state.started) * 1000
+        queries = connection.queries[_state.first_query:]
+        connection.use_debug_cursor = _state.debug_cursor
+        if _state.view is not None:
+            request_stats.record(_state.view, latency,
+                                 _state.template_time * 1000, queries)
+        return response
+
+
+class LazyVoterTokenMiddleware(object):
+    """
+    Stands in for likes' SecretBallotUserIpUseragentMiddleware. The token is
+    only worked out for the views in ``VOTER_TOKEN['VIEWS']``, everything
+    else asks ``core.voting.voter_token`` when it needs one.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if '%s.%s' % (view_func.__module__, view_func.__name__) in VOTER_TOKEN['VIEWS']:
+            request.secretballot_token = voter_token(request)
@@ -1,19 +1,34 @@
+import threading
+
 from django.core.urlresolvers import reverse
 from django.http import HttpResponseRedirect
-from django.template.defaultfilters import slugify
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.signals import request_finished
 
 from django.db import models
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from taggit.managers import TaggableManager
-from taggit.models import Tag
+from taggit.models import Tag, TaggedItem
 from django.contrib.auth.models import AbstractBaseUser, UserManager as DjangoMyUserManager, PermissionsMixin
 
 # this one is for likes
 import secretballot
+from secretballot.models import Vote
 # and this only for bookmarks
 from bookmarks.handlers import library
+from bookmarks.models import Bookmark
 # this is for activity stream
-from actstream import registry, action
+from actstream import registry
+from actstream.models import Action, Follow
+from . import bookmarking, caching, followgraph, hotness, ratings, search, slugs, tagstats, userstats, voting
+# imported for its side effect: it replaces avatar's thumbnail signal handlers
+from . import avatars  # noqa
+from .activity import actions_created, dispatcher
+from .managers import QuestionManager
+from .timeline import timelines
 
 
 class MyUserManager(DjangoMyUserManager):
@@ -59,24 +74,97 @@ class MyUser(AbstractBaseUser, PermissionsMixin):
         return self.username
 
 
+# written by Question.save() only when the row is created
+COUNTER_FIELDS = ('views', 'rating', 'bookmark_count', 'hotness')
+
+
 class Question(models.Model):
     question = models.CharField(max_length=200)
-    slug = models.SlugField(max_length=200, default="")
+    slug = models.SlugField(max_length=200, unique=True)
     details = models.CharField(max_length=500)
     pub_date = models.DateTimeField('date published', auto_now_add=True)
     views = models.IntegerField(default=0)
     answered = models.BooleanField(default=False)
     rating = models.IntegerField(default=0)
+    hotness = models.FloatField(default=0)
+    bookmark_count = models.IntegerField(default=0)
     section = models.CharField(max_length=200)
     author = models.ForeignKey(settings.AUTH_USER_MODEL)
     tags = TaggableManager()
 
+    objects = QuestionManager()
+
+    class Meta:
+        index_together = [
+            ('pub_date', 'id'),
+            ('rating', 'id'),
+            ('hotness', 'id'),
+            ('author', 'pub_date', 'id'),
+        ]
+
+    def get_absolute_url(self):
+        return reverse('question', kwargs={'questionid': self.pk, 'slug': self.slug})
+
     def save(self, *args, **kwargs):
-        self.slug = slugify(self.question)
-        super(Question, self).save(*args, **kwargs)
-        action.send(self.author, verb='asked a question')
-        for tag in self.tags.all():
-            action.send(tag, verb='new question')
+        created = self.pk is None
+        if created:
+            self.hotness = hotness.score(self.rating, self.views, self.answered,
+                                         self.pub_date or timezone.now())
+        elif kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # the counters move with F() updates (views, votes, bookmarks), an
+            # instance loaded before one of them would write it back
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in COUNTER_FIELDS]
+        if created or not self.slug or self.question != self._saved_question:
+            slugs.save_with_slug(self, super(Question, self).save, *args, **kwargs)
+        else:
+            super(Question, self).save(*args, **kwargs)
+        if not created and self.answered != self._saved_answered:
+            # rescored from the stored counters
+            hotness.refresh([self.pk])
+        self._saved_question = self.question
+        self._saved_answered = self.answered
+        if created:
+            dispatcher.send(self.author, verb='asked a question')
+
+
+class SearchDocument(models.Model):
+    question = models.OneToOneField(Question, primary_key=True,
+                                    related_name='search_document')
+    length = models.PositiveIntegerField(default=0)
+
+
+class SearchTerm(models.Model):
+    document = models.ForeignKey(SearchDocument, related_name='terms')
+    term = models.CharField(max_length=64)
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('term', 'document')
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True,
+                                related_name='stats')
+    question_count = models.IntegerField(default=0)
+    total_views = models.IntegerField(default=0)
+    answered_count = models.IntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+
+
+class FollowStats(models.Model):
+    content_type = models.ForeignKey(ContentType)
+    object_id = models.CharField(max_length=255)
+    followers = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+
+
+class TagStats(models.Model):
+    tag = models.OneToOneField(Tag, primary_key=True, related_name='stats')
+    question_count = models.IntegerField(default=0, db_index=True)
+    last_used = models.DateTimeField(null=True, blank=True)
 
 
 secretballot.enable_voting_on(Question)
@@ -88,3 +176,192 @@ registry.register(MyUser)
 registry.register(Question)
 registry.register(Tag)
 
+
+# Tags are attached after the question row exists, so 'new question' goes out
+# when a tag is added. taggit's set() deletes and re-adds every tag, pairs
+# detached in the same thread are not announced twice.
+_detached = threading.local()
+
+
+@receiver(post_delete, sender=TaggedItem)
+def _tag_detached(sender, instance, **kwargs):
+    if not hasattr(_detached, 'pairs'):
+        _detached.pairs = set()
+    _detached.pairs.add((instance.object_id, instance.tag_id))
+
+
+@receiver(request_finished)
+def _forget_detached(sender, **kwargs):
+    _detached.pairs = set()
+
+
+def _is_question_tag(item):
+    return item.content_type_id == ContentType.objects.get_for_model(Question).id
+
+
+@receiver(post_save, sender=TaggedItem)
+def _tag_attached(sender, instance, created, **kwargs):
+    if not created or not _is_question_tag(instance):
+        return
+    pairs = getattr(_detached, 'pairs', set())
+    if (instance.object_id, instance.tag_id) in pairs:
+        pairs.discard((instance.object_id, instance.tag_id))
+        return
+    dispatcher.send(instance.tag, verb='new question')
+
+
+@receiver(post_init, sender=Vote)
+def _remember_vote(sender, instance, **kwargs):
+    instance._saved_vote = instance.vote if instance.pk else 0
+
+
+def _is_question_vote(vote):
+    return vote.content_type_id == ContentType.objects.get_for_model(Question).id
+
+
+@receiver(post_save, sender=Vote)
+def _vote_saved(sender, instance, **kwargs):
+    if _is_question_vote(instance):
+        ratings.apply_vote(instance.object_id, instance.vote - instance._saved_vote)
+    instance._saved_vote = instance.vote
+
+
+@receiver(post_delete, sender=Vote)
+def _vote_deleted(sender, instance, **kwargs):
+    if _is_question_vote(instance):
+        ratings.apply_vote(instance.object_id, -instance._saved_vote)
+
+
+@receiver(post_save, sender=Action)
+def _action_saved(sender, instance, created, **kwargs):
+    if created:
+        timelines.fan_out([instance])
+
+
+@receiver(actions_created)
+def _actions_written(sender, actions, **kwargs):
+    timelines.fan_out(actions)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def _follows_changed(sender, instance, **kwargs):
+    timelines.forget(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+def _followed(sender, instance, created, **kwargs):
+    if created:
+        followgraph.follow_changed(instance, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def _unfollowed(sender, instance, **kwargs):
+    followgraph.follow_changed(instance, -1)
+
+
+@receiver(post_save, sender=Question)
+def _question_saved(sender, instance, **kwargs):
+    search.mark_dirty(instance.pk)
+
+
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def _question_tags_changed(sender, instance, **kwargs):
+    if _is_question_tag(instance):
+        search.mark_dirty(instance.object_id)
+
+
+@receiver(request_finished)
+def _index_dirty_questions(sender, **kwargs):
+    search.index_dirty()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def _question_changed(sender, instance, **kwargs):
+    caching.bump_questions([instance.pk])
+
+
+@receiver(post_save, sender=Vote)
+@receiver(post_delete, sender=Vote)
+def _question_vote_changed(sender, instance, **kwargs):
+    if _is_question_vote(instance):
+        caching.bump_questions([instance.object_id])
+
+
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def _question_tagging_changed(sender, instance, **kwargs):
+    if _is_question_tag(instance):
+        caching.bump_questions([instance.object_id])
+        caching.bump('tags')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def _tag_changed(sender, instance, **kwargs):
+    caching.bump('tags')
+
+
+@receiver(post_save, sender=TaggedItem)
+def _tag_count_up(sender, instance, created, **kwargs):
+    if created and _is_question_tag(instance):
+        tagstats.add_counts({instance.tag_id: 1})
+
+
+@receiver(post_delete, sender=TaggedItem)
+def _tag_count_down(sender, instance, **kwargs):
+    if _is_question_tag(instance):
+        tagstats.add_counts({instance.tag_id: -1})
+
+
+@receiver(post_delete, sender=Question)
+def _question_untagged(sender, instance, **kwargs):
+    # taggit's generic relation doesn't cascade, deleting the items one by one
+    # counts the tags down
+    TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Question),
+                              object_id=instance.pk).delete()
+
+
+@receiver(post_init, sender=Question)
+def _remember_question_stats(sender, instance, **kwargs):
+    instance._saved_stats = (instance.author_id, userstats.contribution(instance))
+    # the title the slug was made from
+    instance._saved_question = instance.question
+    instance._saved_answered = instance.answered
+
+
+@receiver(post_save, sender=Question)
+def _question_stats_saved(sender, instance, created, **kwargs):
+    userstats.question_saved(instance, created)
+    instance._saved_stats = (instance.author_id, userstats.contribution(instance))
+
+
+@receiver(post_delete, sender=Question)
+def _question_stats_deleted(sender, instance, **kwargs):
+    userstats.question_deleted(instance)
+
+
+@receiver(post_save, sender=Vote)
+@receiver(post_delete, sender=Vote)
+def _voter_changed(sender, instance, **kwargs):
+    voting.forget_votes(instance)
+
+
+def _is_question_bookmark(bookmark):
+    return bookmark.content_type_id == ContentType.objects.get_for_model(Question).id
+
+
+@receiver(post_save, sender=Bookmark)
+def _bookmark_added(sender, instance, created, **kwargs):
+    if created and _is_question_bookmark(instance):
+        bookmarking.add_count(instance.object_id, 1)
+        caching.bump_questions([instance.object_id])
+
+
+@receiver(post_delete, sender=Bookmark)
+def _bookmark_removed(sender, instance, **kwargs):
+    if _is_question_bookmark(instance):
+        bookmarking.add_count(instance.object_id, -1)
+        caching.bump_questions([instance.object_id])
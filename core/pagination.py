@@ -0,0 +1,107 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage(object):
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator(object):
+    """
+    Seek pagination over ``keys``, e.g. ``('-pub_date', '-id')``.
+
+    Pages are fetched with ``WHERE (key) < (last seen key) ORDER BY key LIMIT n``,
+    so with a matching index page 1000 costs as much as page one. The last key
+    must be unique. Cursors are opaque urlsafe strings.
+    """
+
+    def __init__(self, queryset, keys, per_page):
+        self.queryset = queryset
+        self.keys = keys
+        self.per_page = per_page
+        self.fields = [queryset.model._meta.get_field(key.lstrip('-'))
+                       for key in keys]
+
+    def encode(self, direction, obj):
+        values = [field.value_to_string(obj) for field in self.fields]
+        data = json.dumps([direction] + values).encode('utf-8')
+        return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+    def decode(self, cursor):
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            data = json.loads(data.decode('utf-8'))
+            direction, values = data[0], data[1:]
+            if direction not in ('n', 'p') or len(values) != len(self.fields):
+                raise ValueError
+            return direction, [field.to_python(value)
+                               for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, IndexError, ValidationError):
+            raise InvalidCursor(cursor)
+
+    def _seek(self, values, forward):
+        """
+        ``(k1, k2, ...) > (v1, v2, ...)`` in the page direction, spelled out
+        for backends without row comparisons.
+        """
+        condition = Q()
+        for i, key in enumerate(self.keys):
+            descending = key.startswith('-') == forward
+            lookup = '%s__%s' % (key.lstrip('-'), 'lt' if descending else 'gt')
+            term = Q(**{lookup: values[i]})
+            for prev_key, value in zip(self.keys[:i], values[:i]):
+                term &= Q(**{prev_key.lstrip('-'): value})
+            condition |= term
+        return condition
+
+    def page(self, cursor=None):
+        forward, queryset = True, self.queryset.order_by(*self.keys)
+        if cursor:
+            direction, values = self.decode(cursor)
+            forward = direction == 'n'
+            if not forward:
+                queryset = self.queryset.order_by(
+                    *[key[1:] if key.startswith('-') else '-' + key
+                      for key in self.keys])
+            queryset = queryset.filter(self._seek(values, forward))
+
+        object_list = list(queryset[:self.per_page + 1])
+        more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if not forward:
+            object_list.reverse()
+        if not object_list:
+            return KeysetPage([], None, None)
+
+        has_next = more if forward else True
+        has_previous = bool(cursor) if forward else more
+        return KeysetPage(
+            object_list,
+            self.encode('n', object_list[-1]) if has_next else None,
+            self.encode('p', object_list[0]) if has_previous else None)
@@ -0,0 +1,28 @@
+from rest_framework import permissions
+
+
+class IsAuthorOrReadOnly(permissions.BasePermission):
+    """
+    Questions are changed by their author or by staff.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return request.user.is_staff or obj.author_id == request.user.pk
+
+
+class IsSelfOrReadOnly(permissions.BasePermission):
+    """
+    Users are created by staff, and changed by themselves or by staff.
+    """
+
+    def has_permission(self, request, view):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return request.user.is_authenticated() and (request.method != 'POST' or request.user.is_staff)
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return request.user.is_staff or obj.pk == request.user.pk
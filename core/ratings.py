@@ -0,0 +1,57 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, Sum
+
+from secretballot.models import Vote
+
+from . import hotness
+
+
+def apply_vote(question_id, delta):
+    """
+    Moves the question's and its author's rating by ``delta`` in place.
+    """
+    from .models import Question, MyUser
+
+    if not delta:
+        return
+    with transaction.atomic():
+        Question.objects.filter(pk=question_id).update(rating=F('rating') + delta)
+        MyUser.objects.filter(
+            pk__in=Question.objects.filter(pk=question_id).values('author_id')
+        ).update(rating=F('rating') + delta)
+        hotness.refresh([question_id])
+
+
+def _set_ratings(model, totals, rated, chunk_size):
+    by_total = {}
+    for pk, total in totals.items():
+        by_total.setdefault(total, []).append(pk)
+    updated = 0
+    for total, pks in by_total.items():
+        for i in range(0, len(pks), chunk_size):
+            updated += model.objects.filter(pk__in=pks[i:i + chunk_size]) \
+                .exclude(rating=total).update(rating=total)
+    updated += model.objects.exclude(rating=0).exclude(pk__in=rated).update(rating=0)
+    return updated
+
+
+def reconcile(chunk_size=500):
+    """
+    Recomputes every rating from the vote table, returns the number of rows
+    that had drifted.
+    """
+    from .models import Question, MyUser
+
+    content_type = ContentType.objects.get_for_model(Question)
+    votes = Vote.objects.filter(content_type=content_type)
+    question_totals = dict(
+        votes.values_list('object_id').annotate(total=Sum('vote')))
+    with transaction.atomic():
+        updated = _set_ratings(Question, question_totals,
+                               votes.values('object_id'), chunk_size)
+        user_totals = dict(
+            Question.objects.values_list('author_id').annotate(total=Sum('rating')))
+        updated += _set_ratings(MyUser, user_totals,
+                                Question.objects.values('author_id'), chunk_size)
+    return updated
@@ -0,0 +1,195 @@
+import atexit
+import base64
+import math
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count
+
+from .pagination import InvalidCursor, KeysetPage
+
+
+QUESTION_SEARCH = {
+    'MAX_RESULTS': 500,
+    'STATS_TIMEOUT': 300,
+    'K1': 1.2,
+    'B': 0.75,
+}
+QUESTION_SEARCH.update(getattr(settings, 'QUESTION_SEARCH', {}))
+
+# how many times a token counts depending on where it was found
+FIELD_WEIGHTS = (
+    ('question', 3),
+    ('tags', 2),
+    ('details', 1),
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 64
+
+
+def tokenize(text):
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text.lower())
+            if len(token) > 1]
+
+
+def question_terms(question, tag_names=None):
+    """
+    Weighted term frequencies and the weighted length of a question.
+    """
+    if tag_names is None:
+        tag_names = question.tags.names()
+    texts = {
+        'question': question.question,
+        'details': question.details,
+        'tags': ' '.join(tag_names),
+    }
+    frequencies = defaultdict(int)
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(texts[field]):
+            frequencies[token] += weight
+    return frequencies, sum(frequencies.values())
+
+
+def index_questions(questions, tag_names=None):
+    """
+    (Re)writes the postings of ``questions`` with one INSERT per table.
+    ``tag_names``, parallel to ``questions``, saves a tag query per question.
+    """
+    from .models import SearchDocument, SearchTerm
+
+    if tag_names is None:
+        tag_names = [None] * len(questions)
+    documents, terms = [], []
+    for question, names in zip(questions, tag_names):
+        frequencies, length = question_terms(question, names)
+        documents.append(SearchDocument(question_id=question.pk, length=length))
+        terms.extend(SearchTerm(document_id=question.pk, term=term, frequency=frequency)
+                     for term, frequency in frequencies.items())
+    pks = [question.pk for question in questions]
+    with transaction.atomic():
+        SearchTerm.objects.filter(document__in=pks).delete()
+        SearchDocument.objects.filter(pk__in=pks).delete()
+        SearchDocument.objects.bulk_create(documents)
+        SearchTerm.objects.bulk_create(terms)
+
+
+def index_question(question):
+    index_questions([question])
+
+
+# questions waiting for index_dirty(), per thread
+_dirty = threading.local()
+
+
+def mark_dirty(question_id):
+    """
+    Queues a question for ``index_dirty()``. Saving it and re-setting its N
+    tags marks it 2N + 1 times, it is indexed once.
+    """
+    if not hasattr(_dirty, 'pks'):
+        _dirty.pks = set()
+    _dirty.pks.add(question_id)
+
+
+def index_dirty():
+    """
+    Indexes the questions this thread marked, at the end of the request.
+    """
+    from .models import Question
+
+    pks, _dirty.pks = getattr(_dirty, 'pks', set()), set()
+    if not pks:
+        return 0
+    questions = list(Question.objects.filter(pk__in=pks).prefetch_related('tags'))
+    index_questions(questions, [[tag.name for tag in question.tags.all()]
+                                for question in questions])
+    return len(questions)
+
+
+@atexit.register
+def _index_on_exit():
+    # commands and the shell mark questions outside of any request
+    try:
+        index_dirty()
+    except Exception:
+        pass
+
+
+def _collection_stats():
+    from .models import SearchDocument
+
+    stats = cache.get('question_search:stats')
+    if stats is None:
+        stats = SearchDocument.objects.aggregate(count=Count('pk'), avg=Avg('length'))
+        cache.set('question_search:stats', stats, QUESTION_SEARCH['STATS_TIMEOUT'])
+    return stats['count'] or 0, stats['avg'] or 1.0
+
+
+def search_questions(query):
+    """
+    Question ids matching ``query``, best BM25 score first.
+
+    Only the postings of the query terms are read, so the cost follows the
+    number of matches and not the size of ``core_question``.
+    """
+    from .models import SearchTerm
+
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+    postings = SearchTerm.objects.filter(term__in=terms).values_list(
+        'document_id', 'term', 'frequency', 'document__length')
+    by_term = defaultdict(list)
+    for document_id, term, frequency, length in postings:
+        by_term[term].append((document_id, frequency, length))
+
+    count, avg_length = _collection_stats()
+    k1, b = QUESTION_SEARCH['K1'], QUESTION_SEARCH['B']
+    scores = defaultdict(float)
+    for term, documents in by_term.items():
+        df = len(documents)
+        idf = math.log(1 + (max(count, df) - df + 0.5) / (df + 0.5))
+        for document_id, frequency, length in documents:
+            norm = frequency + k1 * (1 - b + b * length / avg_length)
+            scores[document_id] += idf * frequency * (k1 + 1) / norm
+    ranked = sorted(scores, key=lambda pk: (-scores[pk], -pk))
+    return ranked[:QUESTION_SEARCH['MAX_RESULTS']]
+
+
+class RankedPaginator(object):
+    """
+    Pages through ``search_questions`` results in rank order, with the same
+    page interface as ``KeysetPaginator``.
+    """
+
+    def __init__(self, queryset, query, per_page):
+        self.queryset = queryset
+        self.ids = search_questions(query)
+        self.per_page = per_page
+
+    def _encode(self, offset):
+        return base64.urlsafe_b64encode(str(offset).encode('ascii')).decode('ascii')
+
+    def _decode(self, cursor):
+        try:
+            offset = int(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except (TypeError, ValueError, UnicodeEncodeError):
+            raise InvalidCursor(cursor)
+        if offset < 0:
+            raise InvalidCursor(cursor)
+        return offset
+
+    def page(self, cursor=None):
+        offset = self._decode(cursor) if cursor else 0
+        ids = self.ids[offset:offset + self.per_page]
+        found = dict((obj.pk, obj) for obj in self.queryset.filter(pk__in=ids))
+        end = offset + self.per_page
+        return KeysetPage(
+            [found[pk] for pk in ids if pk in found],
+            self._encode(end) if end < len(self.ids) else None,
+            self._encode(max(offset - self.per_page, 0)) if offset else None)
@@ -10,6 +10,9 @@ class QuestionIndex(indexes.SearchIndex, indexes.Indexable):
     question = indexes.CharField(model_attr='question')
     details = indexes.CharField(model_attr='details')
 
+    # fields read by the index and its templates, see core.indexing
+    indexed_fields = ('question', 'details')
+
     def get_model(self):
         return Question
 
@@ -22,6 +25,8 @@ class MyUserIndex(indexes.SearchIndex, indexes.Indexable):
     text = indexes.CharField(document=True, use_template=True)
     username = indexes.CharField(model_attr='username')
 
+    indexed_fields = ('username',)
+
     def get_model(self):
         return MyUser
 
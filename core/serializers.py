@@ -12,7 +12,41 @@ class MyUserSerializer(serializers.HyperlinkedModelSerializer):
         lookup_field = 'author'
         view_name = 'user_detail'
 
-class QuestionSerializer(serializers.HyperlinkedModelSerializer):
+def sparse_fields(request):
+    """
+    The field names asked for with ``?fields=a,b``, ``None`` for all of them.
+    """
+    fields = request.QUERY_PARAMS.get('fields') if request else None
+    if not fields:
+        return None
+    return set(name.strip() for name in fields.split(','))
+
+
+class SparseFieldsMixin(object):
+    """
+    Drops the fields a read request didn't ask for before serializing.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(SparseFieldsMixin, self).__init__(*args, **kwargs)
+        request = self.context.get('request')
+        fields = sparse_fields(request) if request and request.method == 'GET' else None
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                del self.fields[name]
+
+
+class QuestionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # defaults to the requesting user, see QuestionViewSet.pre_save
+    author = serializers.SlugRelatedField(slug_field='username', required=False)
+    tags = serializers.SerializerMethodField('get_tags')
+
     class Meta:
         model = Question
-        fields = ('question', 'author')
+        fields = ('id', 'question', 'slug', 'details', 'pub_date', 'views',
+                  'answered', 'rating', 'author', 'tags')
+        read_only_fields = ('slug', 'pub_date', 'views', 'rating')
+
+    def get_tags(self, obj):
+        # .all() so a prefetch_related('tags') is used
+        return [tag.name for tag in obj.tags.all()]
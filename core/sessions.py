@@ -0,0 +1,151 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.contrib.sessions.models import Session
+from django.core.cache import get_cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured, SuspiciousOperation
+from django.utils import timezone
+from django.utils.encoding import force_text
+
+SESSION_STORE = {
+    'CACHE': 'default',
+    # an unchanged session is only written back once its expiry moved this far
+    'EXPIRY_SLACK': 60 * 60,
+    # entries are refreshed from the database after this, whatever the
+    # session's own age
+    'TIMEOUT': 60 * 60,
+    'PURGE_BATCH_SIZE': 1000,
+}
+SESSION_STORE.update(getattr(settings, 'SESSION_STORE', {}))
+
+KEY_PREFIX = 'core.sessions:'
+
+cache = get_cache(SESSION_STORE['CACHE'])
+
+
+class SessionStats(object):
+
+    def __init__(self):
+        self.counts = {'hits': 0, 'misses': 0, 'writes': 0, 'skipped_writes': 0, 'purged': 0}
+        self._lock = threading.Lock()
+
+    def add(self, name, n=1):
+        with self._lock:
+            self.counts[name] += n
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.counts)
+        reads = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = float(stats['hits']) / reads if reads else 0
+        return stats
+
+
+session_stats = SessionStats()
+
+
+class SessionStore(DBStore):
+    """
+    Database sessions read through a cache of ``(data, expire date)``.
+
+    The database stays the source of truth, a flushed or cold cache only
+    costs a SELECT. Saves that don't change the data, and only push the
+    expiry back by less than ``EXPIRY_SLACK``, skip the UPDATE.
+    """
+
+    def __init__(self, session_key=None):
+        if isinstance(cache, LocMemCache):
+            # each process would keep serving the sessions others logged out or changed
+            raise ImproperlyConfigured('core.sessions needs a cache shared by every process, '
+                                       'SESSION_STORE["CACHE"] is a LocMemCache.')
+        super(SessionStore, self).__init__(session_key)
+
+    @property
+    def cache_key(self):
+        return KEY_PREFIX + self._get_or_create_session_key()
+
+    def _cached(self):
+        try:
+            entry = cache.get(self.cache_key)
+        except Exception:
+            # memcached refuses some keys, treat it as a miss
+            return None
+        if entry is not None and entry[1] > timezone.now():
+            return entry
+        return None
+
+    def _cache_entry(self, data, expire_date):
+        cache.set(self.cache_key, (data, expire_date),
+                  min(self.get_expiry_age(expiry=expire_date), SESSION_STORE['TIMEOUT']))
+
+    def load(self):
+        entry = self._cached()
+        if entry is not None:
+            session_stats.add('hits')
+            return entry[0]
+        session_stats.add('misses')
+        try:
+            session = Session.objects.get(session_key=self.session_key,
+                                          expire_date__gt=timezone.now())
+            data = self.decode(session.session_data)
+        except (Session.DoesNotExist, SuspiciousOperation) as e:
+            if isinstance(e, SuspiciousOperation):
+                logger = logging.getLogger('django.security.%s' % e.__class__.__name__)
+                logger.warning(force_text(e))
+            self.create()
+            return {}
+        self._cache_entry(data, session.expire_date)
+        return data
+
+    def exists(self, session_key):
+        if cache.get(KEY_PREFIX + session_key) is not None:
+            return True
+        return super(SessionStore, self).exists(session_key)
+
+    def save(self, must_create=False):
+        expire_date = self.get_expiry_date()
+        if not must_create and self.session_key is not None:
+            entry = self._cached()
+            if entry is not None and entry[0] == self._get_session() and \
+                    expire_date - entry[1] < timedelta(seconds=SESSION_STORE['EXPIRY_SLACK']):
+                session_stats.add('skipped_writes')
+                return
+        super(SessionStore, self).save(must_create)
+        session_stats.add('writes')
+        self._cache_entry(self._get_session(no_load=must_create), expire_date)
+
+    def delete(self, session_key=None):
+        super(SessionStore, self).delete(session_key)
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        cache.delete(KEY_PREFIX + session_key)
+
+    def flush(self):
+        self.clear()
+        self.delete(self.session_key)
+        self.create()
+
+    @classmethod
+    def clear_expired(cls, batch_size=None):
+        """
+        Deletes expired rows ``batch_size`` at a time, so ``clearsessions``
+        doesn't hold one huge DELETE. Their cache entries time out by themselves.
+        """
+        batch_size = batch_size or SESSION_STORE['PURGE_BATCH_SIZE']
+        now = timezone.now()
+        purged = 0
+        while True:
+            keys = list(Session.objects.filter(expire_date__lt=now)
+                        .values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                break
+            Session.objects.filter(session_key__in=keys).delete()
+            purged += len(keys)
+        session_stats.add('purged', purged)
+        return purged
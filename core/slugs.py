@@ -0,0 +1,62 @@
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.template.defaultfilters import slugify
+
+MAX_LENGTH = 200
+# leaves room for a -<n> suffix within MAX_LENGTH
+BASE_LENGTH = MAX_LENGTH - 8
+RETRIES = 5
+
+
+def base_slug(title):
+    return slugify(title)[:BASE_LENGTH].strip('-') or 'question'
+
+
+def assign_slugs(questions):
+    """
+    Gives each question a slug no other row and no other question of the
+    list has, adding -2, -3... to clashing titles. Two queries at most.
+    Another process can still take the same slug before these are written,
+    the unique index turns that into an ``IntegrityError``.
+    """
+    from .models import Question
+
+    others = Question.objects.exclude(pk__in=[question.pk for question in questions
+                                              if question.pk is not None])
+    bases = [base_slug(question.question) for question in questions]
+    taken = set(others.filter(slug__in=set(bases)).values_list('slug', flat=True))
+    clashing = set(base for base in bases if base in taken or bases.count(base) > 1)
+    if clashing:
+        taken.update(others.filter(reduce(or_, (Q(slug__startswith=base + '-')
+                                                for base in clashing)))
+                     .values_list('slug', flat=True))
+    for question, base in zip(questions, bases):
+        slug, n = base, 1
+        while slug in taken:
+            n += 1
+            slug = '%s-%d' % (base, n)
+        question.slug = slug
+        taken.add(slug)
+    return questions
+
+
+def save_with_slug(question, save, *args, **kwargs):
+    """
+    Runs ``save`` after picking a fresh slug, and again with the next free
+    one when a concurrent insert took it first.
+    """
+    from .models import Question
+
+    for attempt in range(RETRIES):
+        assign_slugs([question])
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            clashed = Question.objects.filter(slug=question.slug) \
+                .exclude(pk=question.pk).exists()
+            if not clashed or attempt == RETRIES - 1:
+                raise
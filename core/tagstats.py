@@ -0,0 +1,90 @@
+import math
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from taggit.models import Tag, TaggedItem
+
+from .caching import bump, cache, get_versions
+
+
+def add_counts(counts, when=None):
+    """
+    Moves per-tag question counts by ``{tag_id: delta}``, creating missing rows.
+    """
+    from .models import TagStats
+
+    when = when or timezone.now()
+    for tag_id, delta in counts.items():
+        values = {'question_count': F('question_count') + delta}
+        if delta > 0:
+            values['last_used'] = when
+        if TagStats.objects.filter(tag_id=tag_id).update(**values):
+            continue
+        try:
+            with transaction.atomic():
+                TagStats.objects.create(tag_id=tag_id, question_count=max(delta, 0),
+                                        last_used=when)
+        except IntegrityError:
+            TagStats.objects.filter(tag_id=tag_id).update(**values)
+
+
+def rebuild():
+    """
+    Recomputes every row from taggit_taggeditem, skipping items left behind by
+    deleted questions.
+    """
+    from .models import Question, TagStats
+
+    content_type = ContentType.objects.get_for_model(Question)
+    rows = list(TaggedItem.objects
+                .filter(content_type=content_type, object_id__in=Question.objects.values('pk'))
+                .values_list('tag_id').annotate(count=Count('pk'), last=Max('object_id')))
+    last_used = dict(Question.objects.filter(pk__in=[last for _, _, last in rows])
+                     .values_list('pk', 'pub_date'))
+    with transaction.atomic():
+        TagStats.objects.all().delete()
+        TagStats.objects.bulk_create([
+            TagStats(tag_id=tag_id, question_count=count, last_used=last_used.get(last))
+            for tag_id, count, last in rows])
+    bump('tags')
+    return len(rows)
+
+
+def tag_cloud(limit=100, steps=5):
+    """
+    The ``limit`` most used tags by name, each with its count and a ``weight``
+    from 1 to ``steps`` on a log scale. Cached until tags change.
+    """
+    from .models import TagStats
+
+    key = 'tagcloud:%s:%s:%s' % (limit, steps, get_versions('tags')[0])
+    cloud = cache.get(key)
+    if cloud is None:
+        top = list(TagStats.objects.filter(question_count__gt=0)
+                   .select_related('tag').order_by('-question_count')[:limit])
+        highest = math.log(top[0].question_count + 1) if top else 1
+        cloud = sorted(({
+            'name': stats.tag.name,
+            'slug': stats.tag.slug,
+            'count': stats.question_count,
+            'last_used': stats.last_used and stats.last_used.isoformat(),
+            'weight': 1 + int(round((steps - 1) * math.log(stats.question_count + 1) / highest)),
+        } for stats in top), key=lambda item: item['name'])
+        cache.set(key, cloud, None)
+    return cloud
+
+
+def question_ids_for(tag_name):
+    """
+    Subquery of the ids of questions tagged ``tag_name``, resolved through the
+    tag's id instead of joining taggit_tag for every listing.
+    """
+    from .models import Question
+
+    tag_id = Tag.objects.filter(name=tag_name).values_list('pk', flat=True).first()
+    return TaggedItem.objects.filter(
+        tag_id=tag_id, content_type=ContentType.objects.get_for_model(Question)
+    ).values('object_id')
@@ -0,0 +1,21 @@
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag('likes/inclusion_tags/likes.html', takes_context=True)
+def page_likes(context, obj):
+    """
+    ``{% likes %}`` for objects that went through ``core.prefetch.attach_votes``.
+    """
+    request = context['request']
+    import_js = not hasattr(request, '_django_likes_js_imported')
+    request._django_likes_js_imported = 1
+    return {
+        'request': request,
+        'content_obj': obj,
+        'likes_enabled': True,
+        'can_vote': getattr(obj, 'can_vote', False),
+        'content_type': '-'.join((obj._meta.app_label, obj._meta.model_name)),
+        'import_js': import_js,
+    }
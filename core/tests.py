@@ -0,0 +1,278 @@
+import json
+import threading
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from actstream.models import Action
+from taggit.models import Tag, TaggedItem
+
+from . import hotness, tagstats
+from .caching import cache
+from .counters import CacheBuffer, ViewCounter
+from .models import Question, TagStats
+from .timeline import timelines
+
+
+# bulk_create skips the save() side effects, activity and search indexing,
+# these tests don't care about
+
+def make_users(names):
+    MyUser = get_user_model()
+    MyUser.objects.bulk_create([
+        MyUser(username=name, email='%s@example.com' % name, password=make_password('secret'))
+        for name in names])
+    return list(MyUser.objects.filter(username__in=names).order_by('pk'))
+
+
+def make_questions(authors, start=0):
+    slugs = ['question-%d' % i for i in range(start, start + len(authors))]
+    Question.objects.bulk_create([
+        Question(question=slug, slug=slug, details='Details', section='general', author=author)
+        for slug, author in zip(slugs, authors)])
+    return list(Question.objects.filter(slug__in=slugs).order_by('pk'))
+
+
+class ViewCounterTest(TransactionTestCase):
+
+    def setUp(self):
+        author = make_users(['author'])[0]
+        self.pks = [question.pk for question in make_questions([author] * 3)]
+
+    def test_parallel_hits_are_not_lost(self):
+        counter = ViewCounter({'BACKEND': 'core.counters.LocalBuffer', 'CACHE': 'default',
+                               'FLUSH_INTERVAL': 0.001, 'FLUSH_THRESHOLD': 2})
+        threads, hits = 8, 200
+
+        def hit():
+            try:
+                for i in range(hits):
+                    counter.hit(self.pks[i % len(self.pks)])
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=hit) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        counter.flush()
+
+        views = dict(Question.objects.values_list('pk', 'views'))
+        for i, pk in enumerate(self.pks):
+            self.assertEqual(views[pk], threads * len(range(i, hits, len(self.pks))))
+        self.assertEqual(counter.buffer.size(), 0)
+
+
+class CacheBufferTest(SimpleTestCase):
+
+    def setUp(self):
+        self.buffer = CacheBuffer({'CACHE': 'django.core.cache.backends.locmem.LocMemCache'})
+        self.buffer.cache.clear()
+
+    def test_drained_counters_leave_the_index(self):
+        for pk in range(100):
+            self.buffer.add(pk)
+        self.buffer.add(3, 2)
+        self.assertEqual(self.buffer.size(), 100)
+        counts = self.buffer.drain()
+        self.assertEqual(sum(counts.values()), 102)
+        self.assertEqual(counts[3], 3)
+        self.assertEqual(self.buffer.size(), 0)
+
+        self.buffer.add(7, 2)
+        self.buffer.add(7)
+        self.assertEqual(self.buffer.size(), 1)
+        self.assertEqual(self.buffer.drain(), {7: 3})
+        self.assertEqual(self.buffer.drain(), {})
+
+    def test_hit_during_index_contention_is_not_lost(self):
+        lock = '%s:lock' % self.buffer.prefix
+        self.buffer.cache.add(lock, 1, 60)
+        self.buffer.add(4, 2)
+        self.buffer.add(4)
+        self.assertEqual(self.buffer.size(), 0)
+        self.buffer.cache.delete(lock)
+        self.assertEqual(self.buffer.drain(), {4: 3})
+        self.assertEqual(self.buffer.size(), 0)
+
+    def test_one_drain_at_a_time(self):
+        self.buffer.add(1, 5)
+        self.buffer.cache.add('%s:drain' % self.buffer.prefix, 1, 60)
+        self.assertEqual(self.buffer.drain(), {})
+        self.buffer.cache.delete('%s:drain' % self.buffer.prefix)
+        self.assertEqual(self.buffer.drain(), {1: 5})
+
+
+class TagStatsTest(TestCase):
+
+    def test_deleting_a_question_counts_its_tags_down(self):
+        author = make_users(['author'])[0]
+        first, second = make_questions([author] * 2)
+        first.tags.add('python', 'django')
+        second.tags.add('python')
+        counts = dict(TagStats.objects.values_list('tag__name', 'question_count'))
+        self.assertEqual(counts, {'python': 2, 'django': 1})
+
+        first.delete()
+        counts = dict(TagStats.objects.values_list('tag__name', 'question_count'))
+        self.assertEqual(counts, {'python': 1, 'django': 0})
+        self.assertEqual(tagstats.rebuild(), 1)
+
+    def test_tag_cloud_limit(self):
+        url = reverse('tag_cloud')
+        self.assertEqual(self.client.get(url, {'limit': -1}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'limit': 'x'}).status_code, 400)
+
+
+class QuestionSaveTest(TestCase):
+
+    def test_stale_instance_keeps_the_counters(self):
+        question = make_questions(make_users(['author']))[0]
+        Question.objects.filter(pk=question.pk).update(views=F('views') + 5,
+                                                       rating=F('rating') + 2)
+        question.answered = True
+        question.save()
+        saved = Question.objects.get(pk=question.pk)
+        self.assertEqual((saved.views, saved.rating, saved.answered), (5, 2, True))
+        self.assertEqual(saved.hotness, hotness.score(2, 5, True, saved.pub_date))
+
+
+class QuestionBatchTest(TestCase):
+
+    def setUp(self):
+        self.member, self.other = make_users(['member', 'other'])
+        self.question = make_questions([self.other])[0]
+        self.url = reverse('question_batch')
+
+    def post(self, operations):
+        return self.client.post(self.url, json.dumps(operations), content_type='application/json')
+
+    def test_anonymous_is_refused(self):
+        self.assertEqual(self.post([]).status_code, 403)
+
+    def test_malformed_operations_are_reported(self):
+        self.assertTrue(self.client.login(username='member', password='secret'))
+        response = self.post([{'op': 'create', 'data': 'x'},
+                              {'op': 'create', 'data': [1]},
+                              {'op': 'create', 'data': {'author': ['member']}}])
+        self.assertEqual(response.status_code, 400)
+        errors = [result['errors'] for result in json.loads(response.content.decode())['results']]
+        self.assertEqual(errors[0], {'data': ['Expected an object.']})
+        self.assertEqual(errors[1], {'data': ['Expected an object.']})
+        self.assertEqual(errors[2]['author'], ['No user with this username.'])
+
+    def test_members_write_as_themselves(self):
+        self.assertTrue(self.client.login(username='member', password='secret'))
+        create = {'op': 'create', 'data': {'question': 'Mine', 'details': 'Details',
+                                           'section': 'general'}}
+        response = self.post([create, {'op': 'update', 'id': self.question.pk,
+                                        'data': {'answered': True}}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content.decode())['results'][1]['errors'],
+                         {'id': ['You can only change your own questions.']})
+
+        response = self.post([dict(create, data=dict(create['data'], author='other'))])
+        self.assertEqual(response.status_code, 400)
+
+        response = self.post([create])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Question.objects.get(question='Mine').author, self.member)
+
+
+class TimelineTest(TestCase):
+
+    def test_new_actions_reach_a_cached_feed(self):
+        user = make_users(['member'])[0]
+        self.assertEqual(timelines.ids(user), [])
+        first = Action.objects.create(actor=user, verb='asked a question')
+        second = Action.objects.create(actor=user, verb='asked a question')
+        self.assertEqual(timelines.ids(user), [second.pk, first.pk])
+
+
+class ListingQueriesTest(TestCase):
+    """
+    A listing renders a page of seven rows with as many queries as a page of
+    two, for anonymous visitors and members alike.
+    """
+
+    def setUp(self):
+        make_users(['member'])
+        self.python = Tag.objects.create(name='python', slug='python')
+        self.rows = 0
+        self.add_rows(2)
+
+    def add_rows(self, n):
+        """
+        ``n`` more users, each asking a question tagged python and a tag of
+        its own.
+        """
+        names = ['user%d' % i for i in range(self.rows, self.rows + n)]
+        questions = make_questions(make_users(names), self.rows)
+        Tag.objects.bulk_create([Tag(name=name, slug=name) for name in names])
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+        content_type = ContentType.objects.get_for_model(Question)
+        TaggedItem.objects.bulk_create([
+            TaggedItem(tag_id=tag_id, content_type=content_type, object_id=question.pk)
+            for name, question in zip(names, questions)
+            for tag_id in (self.python.pk, tag_ids[name])])
+        tagstats.rebuild()
+        self.rows += n
+
+    def assertConstantQueries(self, name, **kwargs):
+        # the caches are cleared before each counted request, so the page
+        # is rendered rather than served from the anonymous page cache
+        url = reverse(name, kwargs=kwargs)
+        # content types and the like are loaded once per process
+        self.client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.add_rows(5)
+        cache.clear()
+        with self.assertNumQueries(len(queries)):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def login(self):
+        self.assertTrue(self.client.login(username='member', password='secret'))
+
+    def test_latest(self):
+        self.assertConstantQueries('questions_latest')
+
+    def test_latest_member(self):
+        self.login()
+        self.assertConstantQueries('questions_latest')
+
+    def test_popular(self):
+        self.assertConstantQueries('questions_popular')
+
+    def test_popular_member(self):
+        self.login()
+        self.assertConstantQueries('questions_popular')
+
+    def test_tag(self):
+        self.assertConstantQueries('tag', tag='python')
+
+    def test_tag_member(self):
+        self.login()
+        self.assertConstantQueries('tag', tag='python')
+
+    def test_users(self):
+        self.assertConstantQueries('users')
+
+    def test_users_member(self):
+        self.login()
+        self.assertConstantQueries('users')
+
+    def test_tags(self):
+        self.assertConstantQueries('tags')
+
+    def test_tags_member(self):
+        self.login()
+        self.assertConstantQueries('tags')
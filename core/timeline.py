@@ -0,0 +1,130 @@
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import get_cache
+from django.db.models import Q, get_model
+
+
+TIMELINE = {
+    'CACHE': 'default',
+    'LENGTH': 500,
+    'TIMEOUT': 60 * 60 * 24 * 7,
+}
+TIMELINE.update(getattr(settings, 'TIMELINE', {}))
+
+
+class TimelineStore(object):
+    """
+    Per-user feeds of action ids, newest first, capped at ``LENGTH``.
+
+    Each feed is cached under a per-user version. New actions bump the
+    versions of everyone who should see them (fan-out on write), and feeds
+    are rebuilt from ``actstream_action`` on read. Nothing merges into a
+    cached list, so concurrent fan-outs can't drop each other's entries, and
+    a rebuild that raced a bump lands under a version nobody reads.
+    """
+    prefix = 'timeline'
+
+    def __init__(self, options=TIMELINE):
+        self.cache = get_cache(options['CACHE'])
+        self.length = options['LENGTH']
+        self.timeout = options['TIMEOUT']
+
+    def _key(self, user_id, version):
+        return '%s:%s:%s' % (self.prefix, user_id, version)
+
+    def _version_key(self, user_id):
+        return '%s_version:%s' % (self.prefix, user_id)
+
+    def _version(self, user_id):
+        key = self._version_key(user_id)
+        version = self.cache.get(key)
+        if version is None:
+            # restarts from the clock, like caching.get_versions()
+            self.cache.add(key, int(time.time() * 1000), None)
+            version = self.cache.get(key)
+        return version
+
+    def _bump(self, user_ids):
+        for user_id in user_ids:
+            try:
+                self.cache.incr(self._version_key(user_id))
+            except ValueError:
+                self._version(user_id)
+
+    def recipients(self, actions):
+        """
+        Maps user ids to the actions that belong in their feed: actions the
+        user is part of, plus everything done by what they follow.
+        """
+        Follow = get_model('actstream', 'follow')
+        user_type = ContentType.objects.get_for_model(get_user_model()).pk
+        feeds = defaultdict(set)
+        involved = defaultdict(list)
+        for action in actions:
+            for role in ('actor', 'target', 'action_object'):
+                content_type_id = getattr(action, '%s_content_type_id' % role)
+                if content_type_id is None:
+                    continue
+                object_id = str(getattr(action, '%s_object_id' % role))
+                if content_type_id == user_type:
+                    feeds[int(object_id)].add(action.pk)
+                involved[content_type_id, object_id].append((role, action.pk))
+        if not involved:
+            return feeds
+        wanted = Q()
+        for content_type_id, object_id in involved:
+            wanted |= Q(content_type=content_type_id, object_id=object_id)
+        for user_id, content_type_id, object_id, actor_only in \
+                Follow.objects.filter(wanted).values_list(
+                    'user_id', 'content_type_id', 'object_id', 'actor_only'):
+            for role, action_id in involved[content_type_id, object_id]:
+                if role == 'actor' or not actor_only:
+                    feeds[user_id].add(action_id)
+        return feeds
+
+    def fan_out(self, actions):
+        """
+        Invalidates the feeds of everyone who should see the new actions.
+        """
+        actions = [action for action in actions if action.public]
+        self._bump(self.recipients(actions))
+
+    def rebuild(self, user, version=None):
+        # read before the query, a bump while it runs outdates the result
+        version = version or self._version(user.pk)
+        Action = get_model('actstream', 'action')
+        ids = list(
+            (Action.objects.user(user, with_user_activity=True) |
+             Action.objects.any(user))
+            .prefetch_related(None)
+            .order_by('-timestamp', '-pk')
+            .values_list('pk', flat=True)[:self.length])
+        self.cache.set(self._key(user.pk, version), ids, self.timeout)
+        return ids
+
+    def ids(self, user):
+        version = self._version(user.pk)
+        ids = self.cache.get(self._key(user.pk, version))
+        if ids is None:
+            ids = self.rebuild(user, version)
+        return ids
+
+    def page(self, user, offset=0, limit=30):
+        """
+        One page of the user's feed, costs the page size and not the table.
+        """
+        Action = get_model('actstream', 'action')
+        ids = self.ids(user)[offset:offset + limit]
+        actions = Action.objects.filter(pk__in=ids).fetch_generic_relations()
+        by_id = dict((action.pk, action) for action in actions)
+        return [by_id[pk] for pk in ids if pk in by_id]
+
+    def forget(self, user_id):
+        self._bump([user_id])
+
+
+timelines = TimelineStore()
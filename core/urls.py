@@ -1,7 +1,9 @@
 from django.conf.urls import patterns, url
 
-from .views import QuestionView, QuestionListView, PopularQuestionListView, \
-    MyUserListView, AskQuestionView, MyUserView, MyUserQuestionListView, TagListView, BookmarksView, FeedView, Members
+from .views import QuestionView, QuestionListView, PopularQuestionListView, HotQuestionListView, \
+    MyUserListView, AskQuestionView, MyUserView, MyUserQuestionListView, TagListView, BookmarksView, FeedView, Members, \
+    request_stats_view, TagCloudView, QuestionBatchView, export_view, \
+    db_pool_stats_view, session_stats_view
 
 from django.contrib.auth import get_user_model as user_model
 MyUser = user_model()
@@ -9,10 +11,12 @@ MyUser = user_model()
 urlpatterns = patterns('',
     url(r'^$', QuestionListView.as_view(), name='home'),
     url(r'^question/ask/$', AskQuestionView.as_view(), name='ask_question'),
-    url(r'^question/(?P<questionid>.+)/(?P<slug>[-\w\d]+)$', QuestionView.as_view(), name='question'),
+    url(r'^question/(?P<questionid>\d+)/(?P<slug>[-\w]*)$', QuestionView.as_view(), name='question'),
+    url(r'^q/(?P<slug>[-\w]+)/$', QuestionView.as_view(), name='question_by_slug'),
 
     url(r'^questions/latest/$', QuestionListView.as_view(), name='questions_latest'),
     url(r'^questions/popular/$', PopularQuestionListView.as_view(), name='questions_popular'),
+    url(r'^questions/hot/$', HotQuestionListView.as_view(), name='questions_hot'),
     url(r'^questions/$', QuestionListView.as_view(), name='questions'),
     url(r'^user/(?P<username>.+)/questions/$', MyUserQuestionListView.as_view(), name='user_questions'),
 
@@ -22,6 +26,9 @@ urlpatterns = patterns('',
     url(r'^home/$', AskQuestionView.as_view(), name='home'),
     url(r'^search2/$', QuestionListView.as_view(), name='search_results'),
 
+    # ahead of the router's api/questions/<pk>/
+    url(r'^api/questions/batch/$', QuestionBatchView.as_view(), name='question_batch'),
+    url(r'^api/tags/cloud/$', TagCloudView.as_view(), name='tag_cloud'),
     url(r'^tags/$', TagListView.as_view(template_name='core/tag_list.html'), name='tags'),
     url(r'^tag/(?P<tag>.+)/$', QuestionListView.as_view(template_name='core/question_list.html'), name='tag'),
 
@@ -29,6 +36,11 @@ urlpatterns = patterns('',
 
     url(r'^feed/', FeedView.as_view(), name='feed'),
 
+    url(r'^export/(?P<kind>questions|users|actions)/$', export_view, name='export'),
+    url(r'^stats/requests/$', request_stats_view, name='request_stats'),
+    url(r'^stats/db-pool/$', db_pool_stats_view, name='db_pool_stats'),
+    url(r'^stats/sessions/$', session_stats_view, name='session_stats'),
+
     # temp, should be deleted
     url(r'^members/$', Members.as_view(), name='members'),
     )
@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+
+
+def contribution(question):
+    """
+    What one question adds to its author's counters.
+    """
+    return {'question_count': 1, 'total_views': question.views,
+            'answered_count': 1 if question.answered else 0}
+
+
+def add_counts(user_id, counts, when=None):
+    """
+    Moves the user's counters by ``counts`` in place, creating the row if it
+    is missing. ``when`` advances ``last_activity``.
+    """
+    from .models import UserStats
+
+    counts = dict((name, delta) for name, delta in counts.items() if delta)
+    if not counts and when is None:
+        return
+    values = dict((name, F(name) + delta) for name, delta in counts.items())
+    if when is not None:
+        values['last_activity'] = when
+    if UserStats.objects.filter(user_id=user_id).update(**values):
+        return
+    try:
+        with transaction.atomic():
+            UserStats.objects.create(user_id=user_id, last_activity=when, **dict(
+                (name, max(delta, 0)) for name, delta in counts.items()))
+    except IntegrityError:
+        UserStats.objects.filter(user_id=user_id).update(**values)
+
+
+def question_saved(question, created):
+    """
+    Moves the counters of the question's author, and of its previous author
+    if that changed, by the difference with the state it was loaded with.
+    """
+    new = contribution(question)
+    if created:
+        add_counts(question.author_id, new, when=question.pub_date or timezone.now())
+        return
+    old_author_id, old = question._saved_stats
+    if old_author_id != question.author_id:
+        add_counts(old_author_id, dict((name, -n) for name, n in old.items()))
+        add_counts(question.author_id, new)
+    else:
+        add_counts(question.author_id, dict((name, new[name] - old[name]) for name in new))
+
+
+def question_deleted(question):
+    add_counts(question.author_id, dict(
+        (name, -n) for name, n in contribution(question).items()))
+
+
+def add_views(counts):
+    """
+    Adds flushed ``{question_id: views}`` to their authors, one UPDATE per author.
+    """
+    from .models import Question
+
+    by_author = defaultdict(int)
+    for pk, author_id in Question.objects.filter(pk__in=list(counts)) \
+            .values_list('pk', 'author_id'):
+        by_author[author_id] += counts[pk]
+    for author_id, views in by_author.items():
+        add_counts(author_id, {'total_views': views})
+
+
+def refresh(user_ids=None):
+    """
+    Recomputes the counters of ``user_ids``, or of everyone, from the
+    question table. Returns the number of rows written.
+    """
+    from .models import Question, UserStats
+
+    if user_ids is not None and not user_ids:
+        return 0
+    questions = Question.objects.all()
+    if user_ids is not None:
+        questions = questions.filter(author__in=list(user_ids))
+    totals = questions.values_list('author_id').annotate(
+        Count('pk'), Sum('views'), Max('pub_date'))
+    answered = dict(questions.filter(answered=True).values_list('author_id')
+                    .annotate(Count('pk')))
+    rows = [UserStats(user_id=author_id, question_count=count, total_views=views or 0,
+                      answered_count=answered.get(author_id, 0), last_activity=last)
+            for author_id, count, views, last in totals]
+    with transaction.atomic():
+        stale = UserStats.objects.all()
+        if user_ids is not None:
+            stale = stale.filter(user__in=list(user_ids))
+        stale.delete()
+        UserStats.objects.bulk_create(rows)
+    return len(rows)
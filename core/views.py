@@ -1,17 +1,41 @@
+import json
+
 from django.shortcuts import render, redirect, HttpResponse, get_object_or_404
 
-from django.http import Http404
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, StreamingHttpResponse
 from django.http import HttpResponseNotFound
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
 from django.views.generic import View
 from django.views.generic import ListView
 from django.views.generic.edit import FormView, ProcessFormView, CreateView
 
-from rest_framework import viewsets
-
+from rest_framework import status, viewsets
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.templatetags.rest_framework import replace_query_param
+
+from .avatars import AVATARS
+from .batch import QuestionBatch
+from .bookmarking import resolve as resolve_bookmarks
+from .caching import CachedListingMixin, attach_row_versions, etag, last_modified
+from .counters import view_counter
+from .db.pool import pools
+from .export import export_ndjson, watermark
+from .followgraph import follower_counts
 from .forms import AskQuestionForm
-from .models import Question, MyUser
-from .serializers import QuestionSerializer, MyUserSerializer
+from .instrumentation import request_stats
+from .pagination import KeysetPaginator, InvalidCursor
+from .permissions import IsAuthorOrReadOnly, IsSelfOrReadOnly
+from .prefetch import attach_votes, attach_follows, attach_bookmarks, attach_avatars
+from .search import RankedPaginator
+from .tagstats import question_ids_for, tag_cloud
+from .voting import voter_token
+from .models import Question, MyUser, UserStats
+from .serializers import QuestionSerializer, MyUserSerializer, sparse_fields
 
 from taggit.models import Tag
 
@@ -20,24 +44,37 @@ from bookmarks.models import Bookmark
 
 from django.contrib.auth import get_user_model as user_model
 
-from actstream import action
-from actstream.models import model_stream, any_stream
+from .timeline import timelines
 
 class FeedView(View):
+    paginate_by = 30
 
     def get(self, request):
-        return render(request, 'core/feed.html', { 'stream' : any_stream(request.user) })
+        stream = []
+        if request.user.is_authenticated():
+            try:
+                page = max(int(request.GET.get('page', 1)), 1)
+            except ValueError:
+                raise Http404
+            stream = timelines.page(request.user, (page - 1) * self.paginate_by,
+                                    self.paginate_by)
+        return render(request, 'core/feed.html', { 'stream' : stream })
 
 class QuestionView(View):
+    """
+    A question by id, redirecting to its current slug, or by slug alone.
+    """
     model = Question
 
-    def get(self, request, questionid, slug):
-        try:
-            question = Question.objects.get(pk=questionid)
-        except Question.DoesNotExist:
-            raise Http404
-        question.views += 1
-        question.save()
+    def get(self, request, questionid=None, slug=None):
+        if questionid is not None:
+            question = get_object_or_404(Question, pk=questionid)
+            if slug != question.slug:
+                return redirect(question, permanent=True)
+        else:
+            question = get_object_or_404(Question, slug=slug)
+        view_counter.hit(question.pk)
+        question.views += view_counter.pending(question.pk)
 
         return render(request, 'core/question.html', {'question': question})
 
@@ -46,52 +83,218 @@ class MyUserView(View):
     model = MyUser
 
     def get(self, request, username):
+        user = get_object_or_404(MyUser.objects.select_related('stats'), username=username)
+        return render(request, 'core/user.html', {
+            'user': user,
+            'stats': user_stats(user),
+            'followers': follower_counts([user])[user.pk],
+        })
+
+
+def user_stats(user):
+    """
+    The user's counters, zeroes for someone who hasn't asked anything yet.
+    """
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return UserStats(user=user)
+
+
+QUESTION_ORDERINGS = {
+    'latest': ('-pub_date', '-id'),
+    'popular': ('-rating', '-id'),
+    'hot': ('-hotness', '-id'),
+}
+
+
+class QuestionPageMixin(object):
+    """
+    Paginates a question listing by ``keyset`` and loads vote and follow state
+    for the whole page at once.
+    """
+    paginate_by = 30
+    keyset = QUESTION_ORDERINGS['latest']
+
+    def get_keyset_paginator(self, queryset, page_size):
+        return KeysetPaginator(queryset, self.keyset, page_size)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_keyset_paginator(queryset, page_size)
         try:
-            user = MyUser.objects.get(username=username)
-        except MyUser.DoesNotExist:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
             raise Http404
-        return render(request, 'core/user.html', {'user': user})
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        context = super(QuestionPageMixin, self).get_context_data(**kwargs)
+        questions = list(context['object_list'])
+        attach_row_versions(questions)
+        attach_avatars([question.author for question in questions], AVATARS['LIST_SIZE'])
+        if self.request.user.is_authenticated():
+            attach_votes(questions, voter_token(self.request))
+            attach_follows(questions, self.request.user)
+            attach_bookmarks(questions, self.request.user)
+        else:
+            # anonymous pages are cached and shared, secretballot still refuses
+            # a second vote from the same token
+            for question in questions:
+                question.can_vote, question.is_followed = True, False
+                question.is_bookmarked = False
+        context['object_list'] = context['question_list'] = questions
+        return context
 
 
 #TODO: merge with popular view
-class QuestionListView(ListView):
+class QuestionListView(CachedListingMixin, QuestionPageMixin, ListView):
     model = Question
-    queryset = Question.objects.order_by('-pub_date')
+    queryset = Question.objects.for_listing()
 
     def get_queryset(self):
         queryset = super(QuestionListView, self).get_queryset()
         if 'tag' in self.kwargs:
-            tag = self.kwargs['tag']
-            return queryset.filter(tags__name__in=[tag,])
-        q = self.request.GET.get("q")
-        if q:
-            return queryset.filter(question__icontains=q)
+            return queryset.filter(pk__in=question_ids_for(self.kwargs['tag']))
         return queryset
 
+    def get_keyset_paginator(self, queryset, page_size):
+        q = self.request.GET.get("q")
+        if q and 'tag' not in self.kwargs:
+            return RankedPaginator(queryset, q, page_size)
+        return super(QuestionListView, self).get_keyset_paginator(queryset, page_size)
+
+
+class PopularQuestionListView(CachedListingMixin, QuestionPageMixin, ListView):
+    model = Question
+    queryset = Question.objects.for_listing()
+    keyset = QUESTION_ORDERINGS['popular']
+
 
-class PopularQuestionListView(ListView):
+class HotQuestionListView(CachedListingMixin, QuestionPageMixin, ListView):
     model = Question
-    queryset = Question.objects.order_by('-rating')
+    queryset = Question.objects.for_listing()
+    keyset = QUESTION_ORDERINGS['hot']
 
 
 class MyUserListView(ListView):
     model = MyUser
+    paginate_by = 100
 
+    def get_context_data(self, **kwargs):
+        context = super(MyUserListView, self).get_context_data(**kwargs)
+        users = attach_follows(context['object_list'], self.request.user)
+        attach_avatars(users, AVATARS['LIST_SIZE'])
+        counts = follower_counts(users)
+        for user in users:
+            user.follower_count = counts[user.pk]
+        context['object_list'] = context['myuser_list'] = users
+        return context
 
-class MyUserQuestionListView(ListView):
+
+class MyUserQuestionListView(QuestionPageMixin, ListView):
     model = Question
 
     def get_queryset(self):
-        self.author = get_object_or_404(MyUser, name=self.kwargs['username'])
-        return Question.objects.filter(author=self.author)
+        self.author = get_object_or_404(MyUser.objects.select_related('stats'),
+                                        username=self.kwargs['username'])
+        return Question.objects.for_listing().filter(author=self.author)
+
+    def get_context_data(self, **kwargs):
+        context = super(MyUserQuestionListView, self).get_context_data(**kwargs)
+        context['author'] = self.author
+        context['stats'] = user_stats(self.author)
+        return context
+
+
+def _question_versions(kwargs):
+    if 'pk' in kwargs:
+        return ('question:%s' % kwargs['pk'],)
+    return ('questions',)
+
+
+def _question_etag(request, *args, **kwargs):
+    return etag(request, *_question_versions(kwargs))
+
+
+def _question_last_modified(request, *args, **kwargs):
+    return last_modified(*_question_versions(kwargs))
+
+
+question_condition = method_decorator(
+    condition(etag_func=_question_etag, last_modified_func=_question_last_modified))
 
 
 class QuestionViewSet(viewsets.ModelViewSet):
     """
     API endpoint that allows users to be viewed or edited.
+
+    Reads take ``?fields=`` and answer conditional GETs from the cache
+    version counters, a 304 doesn't touch the database.
     """
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
+    permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
+
+    def pre_save(self, obj):
+        super(QuestionViewSet, self).pre_save(obj)
+        # only staff post or reassign questions in someone else's name
+        if not self.request.user.is_staff or obj.author_id is None:
+            obj.author = self.request.user
+
+    def get_queryset(self):
+        queryset = super(QuestionViewSet, self).get_queryset()
+        fields = sparse_fields(self.request)
+        if fields is None or 'author' in fields:
+            queryset = queryset.select_related('author')
+        if fields is None or 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        return queryset
+
+    @question_condition
+    def retrieve(self, request, *args, **kwargs):
+        return super(QuestionViewSet, self).retrieve(request, *args, **kwargs)
+
+    @question_condition
+    def list(self, request, *args, **kwargs):
+        """
+        Cursor paginated, ``?ordering=latest|popular|hot``.
+        """
+        keyset = QUESTION_ORDERINGS.get(request.QUERY_PARAMS.get('ordering'),
+                                        QUESTION_ORDERINGS['latest'])
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = KeysetPaginator(queryset, keyset, self.get_paginate_by())
+        try:
+            page = paginator.page(request.QUERY_PARAMS.get('cursor'))
+        except InvalidCursor:
+            raise Http404
+        url = request.build_absolute_uri()
+        serializer = self.get_serializer(page.object_list, many=True)
+        return Response({
+            'next': page.next_cursor and
+                replace_query_param(url, 'cursor', page.next_cursor),
+            'previous': page.previous_cursor and
+                replace_query_param(url, 'cursor', page.previous_cursor),
+            'results': serializer.data,
+        })
+
+
+class QuestionBatchView(APIView):
+    """
+    Creates and updates questions in bulk, see ``QuestionBatch``. Nothing is
+    written unless every operation validates; the response lists a result
+    per operation. Members write as themselves, in smaller batches than staff.
+    """
+    permission_classes = (IsAuthenticated,)
+    max_operations = 1000
+    member_max_operations = 100
+
+    def post(self, request):
+        limit = self.max_operations if request.user.is_staff else self.member_max_operations
+        batch = QuestionBatch(request.DATA, request.user, limit)
+        if not batch.is_valid():
+            return Response({'detail': batch.errors, 'results': batch.results},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': batch.apply()})
 
 
 class MyUserViewSet(viewsets.ModelViewSet):
@@ -100,6 +303,7 @@ class MyUserViewSet(viewsets.ModelViewSet):
     """
     queryset = MyUser.objects.all()
     serializer_class = MyUserSerializer
+    permission_classes = (IsSelfOrReadOnly,)
 
 
 class HomeView(View):
@@ -117,8 +321,32 @@ class AskQuestionView(FormView):
         return super(AskQuestionView, self).form_valid(form)
 
 
-class TagListView(ListView):
+class TagListView(CachedListingMixin, ListView):
     model = Tag
+    queryset = Tag.objects.filter(stats__question_count__gt=0) \
+        .select_related('stats').order_by('-stats__question_count', 'name')
+    paginate_by = 100
+    cache_versions = ('tags',)
+
+    def get_context_data(self, **kwargs):
+        context = super(TagListView, self).get_context_data(**kwargs)
+        context['object_list'] = context['tag_list'] = attach_follows(
+            context['object_list'], self.request.user)
+        return context
+
+
+class TagCloudView(APIView):
+    """
+    Most used tags with their question counts, ``?limit=`` up to 500.
+    """
+
+    def get(self, request):
+        try:
+            limit = max(min(int(request.QUERY_PARAMS.get('limit', 100)), 500), 0)
+        except ValueError:
+            return Response({'detail': 'limit must be an integer.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(tag_cloud(limit))
 
 
 #TODO: MembersView?
@@ -130,7 +358,59 @@ class Members(View):
 
 
 class BookmarksView(View):
+    """
+    The user's bookmarks, newest first, cursor paginated and with their
+    objects loaded per content type.
+    """
+    paginate_by = 30
 
     def get(self, request):
-        bookmarks = Bookmark.objects.filter_with_contents(user=self.request.user)
-        return render(request, 'core/bookmark_list.html', { 'bookmarks' : bookmarks })
+        bookmarks, page = [], None
+        if request.user.is_authenticated():
+            paginator = KeysetPaginator(Bookmark.objects.filter(user=request.user),
+                                        ('-id',), self.paginate_by)
+            try:
+                page = paginator.page(request.GET.get('cursor'))
+            except InvalidCursor:
+                raise Http404
+            bookmarks = resolve_bookmarks(page.object_list)
+        return render(request, 'core/bookmark_list.html',
+                      {'bookmarks': bookmarks, 'page_obj': page})
+
+
+@staff_member_required
+def export_view(request, kind):
+    """
+    NDJSON dump of questions, users or actions, streamed in id order.
+    ``?since=`` and ``?after_id=`` limit it to newer rows.
+    """
+    try:
+        options = watermark(request.GET.get('since'), request.GET.get('after_id'))
+    except ValueError as e:
+        return HttpResponse(str(e), status=400, content_type='text/plain')
+    response = StreamingHttpResponse(export_ndjson(kind, **options),
+                                     content_type='application/x-ndjson')
+    response['Content-Disposition'] = 'attachment; filename=%s.ndjson' % kind
+    return response
+
+
+@staff_member_required
+def db_pool_stats_view(request):
+    stats = dict((alias, pool.snapshot()) for alias, pool in pools.items())
+    return HttpResponse(json.dumps(stats, indent=2, sort_keys=True),
+                        content_type='application/json')
+
+
+@staff_member_required
+def session_stats_view(request):
+    # imported here, the session store may not be the configured engine
+    from .sessions import session_stats
+
+    return HttpResponse(json.dumps(session_stats.snapshot(), indent=2, sort_keys=True),
+                        content_type='application/json')
+
+
+@staff_member_required
+def request_stats_view(request):
+    return HttpResponse(json.dumps(request_stats.snapshot(), indent=2, sort_keys=True),
+                        content_type='application/json')
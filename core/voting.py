@@ -0,0 +1,61 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+
+from secretballot.models import Vote
+
+from .caching import cache
+
+VOTER_TOKEN = {
+    # views that read request.secretballot_token, by module.name
+    'VIEWS': ('likes.views.like',),
+    'TIMEOUT': 60 * 60,
+}
+VOTER_TOKEN.update(getattr(settings, 'VOTER_TOKEN', {}))
+
+
+def _generate(request):
+    # what likes.middleware.SecretBallotUserIpUseragentMiddleware hands out
+    if request.user.is_authenticated():
+        return request.user.username
+    try:
+        ip_agent = ''.join((request.META['REMOTE_ADDR'], request.META['HTTP_USER_AGENT']))
+    except KeyError:
+        return None
+    return hashlib.md5(ip_agent.encode('utf-8')).hexdigest()
+
+
+def voter_token(request):
+    """
+    The request's secretballot token, worked out on first use.
+    """
+    if not hasattr(request, '_voter_token'):
+        request._voter_token = _generate(request)
+    return request._voter_token
+
+
+def _voted_key(content_type_id, token):
+    return 'voted:%s:%s' % (content_type_id,
+                            hashlib.md5(token.encode('utf-8')).hexdigest())
+
+
+def voted_ids(model, token):
+    """
+    Ids of the ``model`` objects ``token`` has voted on, cached until it votes
+    again.
+    """
+    if token is None:
+        return set()
+    content_type = ContentType.objects.get_for_model(model)
+    key = _voted_key(content_type.id, token)
+    voted = cache.get(key)
+    if voted is None:
+        voted = set(Vote.objects.filter(token=token, content_type=content_type)
+                    .values_list('object_id', flat=True))
+        cache.set(key, voted, VOTER_TOKEN['TIMEOUT'])
+    return voted
+
+
+def forget_votes(vote):
+    cache.delete(_voted_key(vote.content_type_id, vote.token))
@@ -0,0 +1,127 @@
+import atexit
+import logging
+import queue
+import threading
+
+from django.core.signals import request_finished
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# every backend created, flushed when the process exits
+_backends = []
+
+
+class ImmediateBackend(object):
+    """
+    Keeps items in memory and hands them to ``write`` in the calling thread
+    when ``BATCH_SIZE`` are pending, at the end of a request or on ``flush()``.
+    """
+
+    def __init__(self, options, write, name=None):
+        self.write = write
+        self.batch_size = options.get('BATCH_SIZE', 1)
+        self._pending = []
+        self._lock = threading.Lock()
+        request_finished.connect(self._on_request_finished, weak=False)
+        _backends.append(self)
+
+    def _on_request_finished(self, **kwargs):
+        self.flush()
+
+    def put(self, item):
+        with self._lock:
+            self._pending.append(item)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            self.write(pending)
+        return len(pending)
+
+
+class ThreadBackend(object):
+    """
+    Hands items to a worker thread which passes them to ``write`` in batches
+    of up to ``BATCH_SIZE``, waiting at most ``FLUSH_INTERVAL`` seconds for a
+    batch to fill.
+    """
+
+    def __init__(self, options, write, name=None):
+        self.write = write
+        self.name = name
+        self.batch_size = options.get('BATCH_SIZE', 1)
+        self.flush_interval = options.get('FLUSH_INTERVAL')
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        _backends.append(self)
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=self.name)
+                self._worker.daemon = True
+                self._worker.start()
+
+    def _take(self, block):
+        batch = []
+        try:
+            batch.append(self._queue.get(block, self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        try:
+            self.write(batch)
+        except Exception:
+            logger.exception('%s dropped %d items', self.name or 'Worker', len(batch))
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self):
+        while True:
+            batch = self._take(block=True)
+            if batch:
+                # no request_finished here to drop stale or broken connections
+                close_old_connections()
+                try:
+                    self._write(batch)
+                finally:
+                    close_old_connections()
+
+    def put(self, item):
+        self._start()
+        self._queue.put(item)
+
+    def flush(self):
+        """
+        Blocks until everything queued so far is written.
+        """
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.join()
+            return 0
+        written = 0
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                return written
+            self._write(batch)
+            written += len(batch)
+
+
+@atexit.register
+def _flush_on_exit():
+    for backend in _backends:
+        try:
+            backend.flush()
+        except Exception:
+            pass
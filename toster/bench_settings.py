@@ -0,0 +1,38 @@
+"""
+Settings for ``manage.py benchmark``: SQLite, in-process caches and search,
+nothing that needs a running service.
+"""
+from .settings import *
+
+DEBUG = False
+TEMPLATE_DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'bench.sqlite3'),
+    }
+}
+SOUTH_TESTS_MIGRATE = False
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+# core.sessions refuses a per-process cache
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+HAYSTACK_CONNECTIONS = {
+    'default': {
+        'ENGINE': 'haystack.backends.simple_backend.SimpleEngine',
+    },
+}
+HAYSTACK_SIGNAL_PROCESSOR = 'haystack.signals.BaseSignalProcessor'
+
+ACTION_DISPATCHER = {'BACKEND': 'core.workers.ImmediateBackend'}
+SEARCH_QUEUE = {'BACKEND': 'core.workers.ImmediateBackend'}
+
+PASSWORD_HASHERS = (
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+)
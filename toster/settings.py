@@ -50,13 +50,14 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE_CLASSES = (
+    'core.middleware.RequestStatsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    "likes.middleware.SecretBallotUserIpUseragentMiddleware",
+    'core.middleware.LazyVoterTokenMiddleware',
 )
 
 ROOT_URLCONF = 'toster.urls'
@@ -71,9 +72,36 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql_psycopg2',
         'NAME': 'toster',
+        # seconds a thread keeps its connection between requests
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 60)),
     }
 }
 
+# DATABASE_POOL=1 shares a pool of connections between the threads of a
+# worker (gunicorn --threads) instead. Django hands them back after every
+# request, the pool keeps them open. core.db.backends.sqlite3_pool does the
+# same over a SQLite file for trying it locally.
+if os.environ.get('DATABASE_POOL'):
+    DATABASES['default'].update(ENGINE='core.db.backends.postgresql_pool', CONN_MAX_AGE=0)
+
+DB_POOL = {
+    'MAX_SIZE': int(os.environ.get('DATABASE_POOL_SIZE', 10)),
+}
+
+
+# Shared by every worker process: the page cache version counters, buffered
+# view counts and sessions only work if a bump in one process is seen by all.
+# MEMCACHED_SERVERS is a comma separated list of host:port.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyLibMCCache',
+        'LOCATION': os.environ.get('MEMCACHED_SERVERS', '127.0.0.1:11211').split(','),
+    }
+}
+
+# database sessions behind the cache, see core.sessions
+SESSION_ENGINE = 'core.sessions'
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/1.6/topics/i18n/
@@ -98,9 +126,10 @@ FIXTURE_DIRS = (
    '../fixtures/',
 )
 
-#    'DEFAULT_PERMISSION_CLASSES': ('rest_framework.permissions.IsAdminUser',),
 REST_FRAMEWORK = {
-    'PAGINATE_BY': 10
+    'PAGINATE_BY': 10,
+    # views narrow this down to authors and staff, see core.permissions
+    'DEFAULT_PERMISSION_CLASSES': ('rest_framework.permissions.IsAuthenticatedOrReadOnly',),
 }
 
 # Honor the 'X-Forwarded-Proto' header for request.is_secure()
@@ -123,7 +152,14 @@ HAYSTACK_CONNECTIONS = {
         'INDEX_NAME': 'haystack',
     },
 }
-HAYSTACK_SIGNAL_PROCESSOR = 'haystack.signals.RealtimeSignalProcessor'
+HAYSTACK_SIGNAL_PROCESSOR = 'core.indexing.QueuedSignalProcessor'
+
+# fraction of requests timed by core.middleware.RequestStatsMiddleware,
+# aggregates are at /stats/requests/ for staff
+REQUEST_STATS = {
+    'SAMPLE_RATE': 0.1,
+    'N_PLUS_ONE_THRESHOLD': 5,
+}
 
 SOUTH_MIGRATION_MODULES = {
     'taggit': 'taggit.south_migrations',
@@ -192,6 +228,9 @@ LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/members/'
 LOGIN_ERROR_URL = '/login-error/'
 
+# profile size and the listings' size, resized in the background on upload
+AUTO_GENERATE_AVATAR_SIZES = (80, 32)
+
 try:
     from .local_settings import *
 except:
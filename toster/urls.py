@@ -12,11 +12,12 @@ User = user_model()
 
 
 router = routers.DefaultRouter()
-router.register(r'/api/users', views.MyUserViewSet)
-router.register(r'/api/questions', views.QuestionViewSet)
+router.register(r'api/users', views.MyUserViewSet)
+router.register(r'api/questions', views.QuestionViewSet)
 
 urlpatterns = patterns('',
     url(r'^', include('core.urls')),
+    url(r'^', include(router.urls)),
     url(r'^admin/', include(admin.site.urls)),
     url(r'^about/', TemplateView.as_view(template_name='about.html'), name='about'),
     url(r'^search/', include('haystack.urls')),
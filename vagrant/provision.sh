@@ -4,6 +4,7 @@ sudo apt-get update
 
 sudo apt-get install -y python3 python-dev python-pip
 sudo apt-get install -y libpq-dev postgresql postgresql-contrib
+sudo apt-get install -y memcached libmemcached-dev zlib1g-dev
 
 ## INSTALL ELASTICSEARCH
 